@@ -1,24 +1,88 @@
+import time
+import logging
+import operator
+import threading
+import sys
 from typing import TypedDict, Annotated
 from langchain_core.messages import HumanMessage, AIMessage
+from langchain_core.runnables import RunnableLambda
 from langgraph.graph import StateGraph, END
 from langgraph.graph.message import add_messages
-from langgraph.prebuilt import ToolNode
-from backend.graph.nodes import should_continue, call_model, check_greeting_or_irrelevant, tools
+from backend.graph.nodes import (
+    should_continue,
+    call_model,
+    acall_model,
+    call_tools,
+    acall_tools,
+    check_greeting_or_irrelevant,
+    acheck_greeting_or_irrelevant,
+    route_input,
+    start_budget
+)
+from backend.graph.intent import DATA
+from backend.utils.metrics import registry
+from backend.utils.timing import stage
 
+logger = logging.getLogger(__name__)
 
-class AgentState(TypedDict):
+graph_compile_seconds = registry.gauge(
+    "sql_agent_graph_compile_seconds",
+    "Time taken to build and compile the LangGraph workflow"
+)
+agent_iterations = registry.histogram(
+    "sql_agent_agent_iterations",
+    "Model turns per question in the agent graph",
+    buckets=(1, 2, 3, 4, 5, 6, 8, 10, 15, 25)
+)
+
+_agent = None
+_agent_lock = threading.Lock()
+
+
+class AgentState(TypedDict, total=False):
     messages: Annotated[list, add_messages]
+    question: str
+    preinject_schema: bool
+    sql_model: str
+    intent: str
+    schema_context: str
+    schema_stats: dict
+    few_shot: str
+    budget: dict
+    iterations: Annotated[int, operator.add]
+    llm_tokens: Annotated[int, operator.add]
+    stop_reason: str
+    queries: Annotated[list, operator.add]
 
-def get_agent():
+def traced_node(name, func, afunc=None):
+    """Wrap a graph node so each run is timed as a pipeline stage (and traced when tracing is on)."""
+    def run(state):
+        with stage(name):
+            return func(state)
+    
+    async def arun(state):
+        with stage(name):
+            return await afunc(state) if afunc else func(state)
+    
+    return RunnableLambda(run, afunc=arun, name=name)
+
+def build_agent():
     workflow = StateGraph(AgentState)
     
-    workflow.add_node("check_input", check_greeting_or_irrelevant)
-    workflow.add_node("agent", call_model)
-    workflow.add_node("tools", ToolNode(tools))
+    workflow.add_node("check_input", traced_node("check_input", check_greeting_or_irrelevant, acheck_greeting_or_irrelevant))
+    workflow.add_node("agent", traced_node("agent", call_model, acall_model))
+    workflow.add_node("tools", traced_node("tools", call_tools, acall_tools))
     
     workflow.set_entry_point("check_input")
     
-    workflow.add_edge("check_input", "agent")
+    workflow.add_conditional_edges(
+        "check_input",
+        route_input,
+        {
+            "agent": "agent",
+            END: END,
+        }
+    )
     workflow.add_conditional_edges(
         "agent",
         should_continue,
@@ -33,19 +97,77 @@ def get_agent():
     
     return app
 
-def run_agent(question: str):
-    agent = get_agent()
+def get_agent():
+    global _agent
     
+    if _agent is None:
+        with _agent_lock:
+            if _agent is None:
+                started = time.perf_counter()
+                _agent = build_agent()
+                elapsed = time.perf_counter() - started
+                graph_compile_seconds.set(elapsed)
+                logger.info("Compiled agent graph in %.3fs", elapsed)
+    
+    return _agent
+
+def initial_agent_state(question, preinject_schema=None, sql_model=None, budget=None):
     initial_state = {
-        "messages": [HumanMessage(content=question)]
+        "messages": [HumanMessage(content=question)],
+        "question": question,
+        "budget": start_budget(budget)
     }
-    
-    result = agent.invoke(initial_state)
-    
+    if preinject_schema is not None:
+        initial_state["preinject_schema"] = preinject_schema
+    if sql_model is not None:
+        initial_state["sql_model"] = sql_model
+    return initial_state
+
+def final_response(result):
     messages = result["messages"]
     final_message = messages[-1]
     
     if isinstance(final_message, AIMessage):
-        return final_message.content
+        response = final_message.content
     else:
-        return str(final_message)
\ No newline at end of file
+        response = str(final_message)
+    
+    return response, result.get("queries", []), result.get("intent"), result.get("stop_reason")
+
+def record_iterations(result):
+    if result.get("intent", DATA) != DATA:
+        return
+    agent_iterations.observe(result.get("iterations", 0))
+
+def graph_config(state):
+    """
+    LangGraph's recursion limit as a backstop: each model turn is two steps (agent, tools) plus the entry and stop
+    steps. Without an iteration limit it is lifted too, or LangGraph's default of 25 would end the loop with an error.
+    """
+    max_iterations = state["budget"]["max_iterations"]
+    return {"recursion_limit": 2 * max_iterations + 4 if max_iterations else sys.maxsize}
+
+def run_agent(question: str, preinject_schema: bool = None, sql_model: str = None, budget: dict = None):
+    agent = get_agent()
+    state = initial_agent_state(question, preinject_schema, sql_model, budget)
+    result = agent.invoke(state, config=graph_config(state))
+    record_iterations(result)
+    return final_response(result)
+
+async def run_agent_async(question: str, preinject_schema: bool = None, sql_model: str = None, budget: dict = None):
+    agent = get_agent()
+    state = initial_agent_state(question, preinject_schema, sql_model, budget)
+    result = await agent.ainvoke(state, config=graph_config(state))
+    record_iterations(result)
+    return final_response(result)
+
+async def astream_agent(question: str, preinject_schema: bool = None, sql_model: str = None, budget: dict = None):
+    agent = get_agent()
+    state = initial_agent_state(question, preinject_schema, sql_model, budget)
+    iterations = 0
+    async for update in agent.astream(state, config=graph_config(state), stream_mode="updates"):
+        for node, node_update in update.items():
+            iterations += (node_update or {}).get("iterations", 0)
+            yield node, node_update or {}
+    if iterations:
+        agent_iterations.observe(iterations)
@@ -1,35 +1,110 @@
-import os
+import time
 from dotenv import load_dotenv
-from langchain_groq import ChatGroq
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
+from backend.graph.answer_templates import render_answer
+from backend.graph.llm import get_chat_model, answer_model_name
+from backend.utils.metrics import registry
+from backend.utils.timing import stage
+from backend.utils.concurrency import llm_slot
+from backend.utils.config import env_flag
 
 load_dotenv()
 
-def generate_answer(user_question, sql_query, db_result):
-    prompt = ChatPromptTemplate.from_template("""
-        User asked: {user_question}
-        SQL Query: {sql_query}
-        Database result: {db_result}
+answers_total = registry.counter(
+    "sql_agent_answers_total",
+    "Answers produced, by renderer (template or llm)"
+)
+answer_seconds_total = registry.counter(
+    "sql_agent_answer_seconds_total",
+    "Time spent producing answers, by renderer (template or llm)"
+)
 
-        Provide ONLY a direct, natural language answer. Do not include explanations, reasoning, or extra text.
+answer_prompt = ChatPromptTemplate.from_template("""
+    User asked: {user_question}
+    SQL Query: {sql_query}
+    Database result: {db_result}
 
-        Examples:
-        - If result = [(20,)] → "There are 20 students."
-        - If result = [('John',), ('Jane',)] → "The students are John and Jane."
-        - If result = [(100, 'CS'), (50, 'Math')] → "There are 100 students in CS and 50 students in Math."
-        
-        Answer:
-    """)
+    Provide ONLY a direct, natural language answer. Do not include explanations, reasoning, or extra text.
+
+    Examples:
+    - If result = [(20,)] → "There are 20 students."
+    - If result = [('John',), ('Jane',)] → "The students are John and Jane."
+    - If result = [(100, 'CS'), (50, 'Math')] → "There are 100 students in CS and 50 students in Math."
+    
+    Answer:
+""")
 
-    llm = ChatGroq(
-        groq_api_key=os.getenv("GROQ_API_KEY"),
-        model_name="llama3-8b-8192"
-    )
+def answer_chain(model=None):
+    return answer_prompt | get_chat_model(answer_model_name(model)) | StrOutputParser()
 
-    chain = prompt | llm | StrOutputParser()
-    return chain.invoke({
+def generate_answer(user_question, sql_query, db_result, model=None):
+    return answer_chain(model).invoke({
         "user_question": user_question,
         "sql_query": sql_query,
         "db_result": db_result
     })
+
+async def agenerate_answer(user_question, sql_query, db_result, model=None):
+    async with llm_slot():
+        return await answer_chain(model).ainvoke({
+            "user_question": user_question,
+            "sql_query": sql_query,
+            "db_result": db_result
+        })
+
+def answer_templates_enabled():
+    return env_flag("ANSWER_TEMPLATES", True)
+
+def render_template_answer(user_question, execution):
+    if not answer_templates_enabled() or not execution or execution["error"] or execution.get("truncated"):
+        return None
+    
+    started = time.perf_counter()
+    data = execution["data"]
+    answer = render_answer(user_question, data.columns, data.rows()) if data is not None else None
+    if answer is not None:
+        answers_total.inc(renderer="template")
+        answer_seconds_total.inc(time.perf_counter() - started, renderer="template")
+    return answer
+
+@stage("answer")
+def answer_question(user_question, sql_query, db_result, execution=None, model=None):
+    answer = render_template_answer(user_question, execution)
+    if answer is not None:
+        return answer
+    
+    started = time.perf_counter()
+    answer = generate_answer(user_question, sql_query, db_result, model)
+    answers_total.inc(renderer="llm")
+    answer_seconds_total.inc(time.perf_counter() - started, renderer="llm")
+    return answer
+
+async def aanswer_question(user_question, sql_query, db_result, execution=None, model=None):
+    with stage("answer"):
+        answer = render_template_answer(user_question, execution)
+        if answer is not None:
+            return answer
+        
+        started = time.perf_counter()
+        answer = await agenerate_answer(user_question, sql_query, db_result, model)
+        answers_total.inc(renderer="llm")
+        answer_seconds_total.inc(time.perf_counter() - started, renderer="llm")
+        return answer
+
+async def astream_answer(user_question, sql_query, db_result, execution=None, model=None):
+    with stage("answer"):
+        answer = render_template_answer(user_question, execution)
+        if answer is not None:
+            yield answer
+            return
+        
+        started = time.perf_counter()
+        async for token in answer_chain(model).astream({
+            "user_question": user_question,
+            "sql_query": sql_query,
+            "db_result": db_result
+        }):
+            yield token
+        answers_total.inc(renderer="llm")
+        answer_seconds_total.inc(time.perf_counter() - started, renderer="llm")
@@ -0,0 +1,110 @@
+import re
+import datetime
+from decimal import Decimal
+
+MAX_LIST_ITEMS = 20
+MAX_GROUP_ROWS = 10
+MAX_RECORD_COLUMNS = 6
+
+AGGREGATE_COLUMNS = {"count", "sum", "avg", "min", "max", "?column?"}
+
+
+def humanize(column):
+    return re.sub(r"[_\s]+", " ", column).strip().lower()
+
+
+def pluralize(phrase):
+    if phrase.endswith("s"):
+        return phrase
+    if phrase.endswith("y") and phrase[-2:-1] not in "aeiou":
+        return phrase[:-1] + "ies"
+    return phrase + "s"
+
+
+def format_value(value):
+    if value is None:
+        return "none"
+    if isinstance(value, bool):
+        return "yes" if value else "no"
+    if isinstance(value, float):
+        return f"{value:.2f}".rstrip("0").rstrip(".")
+    if isinstance(value, (datetime.date, datetime.datetime, datetime.time)):
+        return value.isoformat()
+    return str(value)
+
+
+def join_items(items):
+    if len(items) <= 1:
+        return "".join(items)
+    return ", ".join(items[:-1]) + " and " + items[-1]
+
+
+def _is_number(value):
+    return isinstance(value, (int, float, Decimal)) and not isinstance(value, bool)
+
+
+def _counted_subject(question):
+    match = re.search(r"\bhow many ((?:[a-z]+ ?){1,3})", question.lower())
+    if not match:
+        return None
+
+    words = []
+    for word in match.group(1).split():
+        words.append(word)
+        if word.endswith("s"):
+            return " ".join(words)
+    return None
+
+
+def render_scalar(question, column, value):
+    name = humanize(column)
+
+    if name == "count" and _is_number(value):
+        subject = _counted_subject(question)
+        if subject and value != 1:
+            return f"There are {format_value(value)} {subject}."
+        return f"The count is {format_value(value)}."
+
+    if column in AGGREGATE_COLUMNS:
+        return f"The result is {format_value(value)}."
+
+    return f"The {name} is {format_value(value)}."
+
+
+def render_answer(question, columns, rows):
+    """
+    Render a direct answer for common result shapes without calling the LLM.
+
+    Handles empty results, a single value, a single column list, a single record and small
+    label/value groupings. Returns None for anything else so the caller can fall back to the LLM.
+    """
+    if rows is None or not columns:
+        return None
+
+    if not rows:
+        return "No matching records were found."
+
+    if len(columns) == 1:
+        values = [format_value(row[0]) for row in rows]
+        if len(rows) == 1:
+            return render_scalar(question, columns[0], rows[0][0])
+        if len(rows) <= MAX_LIST_ITEMS:
+            return f"The {pluralize(humanize(columns[0]))} are {join_items(values)}."
+        return None
+
+    if len(rows) == 1 and len(columns) <= MAX_RECORD_COLUMNS:
+        fields = [f"{humanize(column)}: {format_value(value)}" for column, value in zip(columns, rows[0])]
+        return f"The result is {join_items(fields)}."
+
+    if len(columns) == 2 and len(rows) <= MAX_GROUP_ROWS:
+        if all(_is_number(row[1]) for row in rows):
+            label_index, value_index = 0, 1
+        elif all(_is_number(row[0]) for row in rows):
+            label_index, value_index = 1, 0
+        else:
+            return None
+        pairs = [f"{format_value(row[label_index])}: {format_value(row[value_index])}" for row in rows]
+        heading = f"{humanize(columns[value_index])} by {humanize(columns[label_index])}"
+        return f"{heading[0].upper()}{heading[1:]}: {join_items(pairs)}."
+
+    return None
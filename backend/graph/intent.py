@@ -0,0 +1,244 @@
+import os
+import re
+import json
+import math
+import threading
+from collections import Counter
+from backend.graph.schema_retrieval import stem
+from backend.utils.config import env_flag
+
+GREETING, OFF_TOPIC, SCHEMA, DATA = "greeting", "off_topic", "schema", "data"
+INTENTS = (GREETING, OFF_TOPIC, SCHEMA, DATA)
+
+# A message is a greeting only if every token is one of these and it has a greeting cue, so "hi" never
+# matches "which" or "history" and "is it going up" is not small talk
+GREETING_WORDS = {
+    "hi", "hello", "hey", "hiya", "howdy", "yo", "greetings", "good", "morning", "afternoon", "evening",
+    "day", "how", "are", "you", "doing", "is", "it", "going", "what's", "whats", "up", "sup", "there",
+    "thanks", "thank", "thx", "cheers", "bye", "goodbye", "ok", "okay", "nice", "to", "meet", "please",
+    "great", "awesome", "cool", "again", "all", "everyone", "bot", "agent", "assistant", "i'm", "fine",
+}
+GREETING_CUES = {
+    "hi", "hello", "hey", "hiya", "howdy", "yo", "greetings", "morning", "afternoon", "evening", "sup",
+    "thanks", "thank", "thx", "cheers", "bye", "goodbye",
+}
+GREETING_PHRASES = {"how are you", "how are you doing", "how is it going", "what's up", "whats up", "nice to meet you"}
+
+# A question is about the schema only if it names the structure and every other token is one of these or
+# a table/column name, so "which fields are empty in customers" stays a data question
+STRUCTURE_WORDS = {
+    "tables", "columns", "column", "fields", "field", "attributes", "schema", "schemas", "structure",
+    "entities", "relations", "relationships", "describe", "explain",
+}
+SCHEMA_WORDS = STRUCTURE_WORDS | {
+    "what", "which", "list", "show", "display", "give", "tell", "me", "us", "all", "of", "the", "a", "an",
+    "do", "does", "you", "we", "i", "have", "has", "are", "is", "exist", "exists", "there", "available",
+    "in", "on", "for", "this", "your", "our", "database", "db", "how", "many", "kind", "kinds", "type",
+    "types", "can", "query", "table", "data", "model", "its", "their", "names", "name", "please",
+}
+SCHEMA_PATTERNS = [
+    re.compile(r"^what (kind of |kinds of |sort of |types? of )?(data|information) (do you have|do we have|is (there|available|stored))( in (the |this |your |our )?(database|db))?$"),
+]
+
+# Business words that make a question about the user's data, whatever the naive Bayes model says
+DATA_CUES = {stem(word) for word in (
+    "our", "we", "us", "company", "top", "bottom", "most", "least", "highest", "lowest",
+    "total", "sum", "average", "avg", "count", "number", "amount", "summary", "summarize", "overview", "report",
+    "trend", "growth", "compare", "comparison", "rank", "ranking", "breakdown", "sales", "sale", "revenue",
+    "profit", "margin", "client", "clients", "customer", "customers", "user", "users", "order", "orders",
+    "product", "products", "item", "items", "price", "prices", "cost", "costs", "spend", "spent", "invoice",
+    "payment", "payments", "inventory", "employee", "employees", "month", "monthly", "year",
+    "yearly", "week", "weekly", "quarter", "daily", "yesterday", "record", "records", "row", "rows",
+)}
+
+# Seed examples for the naive Bayes model; INTENT_TRAINING_PATH adds more as {"text", "intent"} JSON lines
+TRAINING_EXAMPLES = {
+    GREETING: [
+        "hello", "hi there", "hey", "good morning", "good evening everyone", "how are you", "how is it going",
+        "hi how are you doing", "thanks", "thank you so much", "bye", "nice to meet you", "hey bot",
+        "greetings", "what's up", "cheers mate", "hello again", "good afternoon assistant",
+    ],
+    OFF_TOPIC: [
+        "what is the weather today", "tell me a joke", "write me a poem", "who won the football game",
+        "what is the capital of france", "recommend a good movie", "play some music", "what is the news today",
+        "give me a recipe for pasta", "tell me a story", "who is the president", "translate hello into spanish",
+        "what is the meaning of life", "how do i cook rice", "write an email to my boss",
+        "what time is it in tokyo", "explain quantum physics", "help me with my homework",
+        "what are you", "who made you", "are you a robot", "sing a song", "what is love",
+        "how tall is mount everest", "book a flight to london", "what's your favorite color",
+        "what's the weather like in paris", "weather forecast for tomorrow", "will it rain tomorrow", "movies",
+        "best movies of all time", "latest sports scores", "stock price of apple", "who are you",
+    ],
+    SCHEMA: [
+        "what tables exist", "what tables are there", "list all tables", "show me the tables",
+        "what columns does the orders table have", "describe the database", "what is the schema",
+        "which tables are available", "what data do you have", "what fields are in the customers table",
+        "describe the products table", "show the database structure", "what kind of data is stored",
+        "list the columns of orders", "how many tables are there", "what information is in the database",
+    ],
+    DATA: [
+        "how many customers are there", "which customers placed more than 5 orders", "show all orders",
+        "what is the total revenue per month", "list products by price", "top 10 customers by spend",
+        "average order value", "which city has the most customers", "count orders by status",
+        "what are the product categories", "show me sales for last year", "who bought the most items",
+        "which products have never been ordered", "orders placed in march", "revenue by category",
+        "find customers without orders", "what is the most expensive product", "total sales this week",
+        "how many orders did john place", "show the latest 20 orders", "which employees sold the most",
+        "what is the history of orders for customer 5", "list customers from karachi",
+        "what was the highest order amount", "compare sales between 2023 and 2024",
+    ],
+}
+
+_model = None
+_model_lock = threading.Lock()
+
+
+def intent_settings_from_env():
+    return {
+        "enabled": env_flag("INTENT_CLASSIFIER", True),
+        "threshold": float(os.getenv("INTENT_THRESHOLD", "0.8")),
+        "training_path": os.getenv("INTENT_TRAINING_PATH")
+    }
+
+
+def intent_tokens(text):
+    return re.findall(r"[a-z0-9_']+", text.lower())
+
+
+def intent_features(tokens):
+    words = [stem(token) for token in tokens]
+    return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+
+class NaiveBayesIntentModel:
+    """Multinomial naive Bayes over stemmed unigrams and bigrams with Laplace smoothing."""
+
+    def __init__(self, examples):
+        self.priors = {}
+        self.likelihoods = {}
+        self.unseen = {}
+
+        counts = {intent: Counter() for intent in examples}
+        for intent, texts in examples.items():
+            for text in texts:
+                counts[intent].update(intent_features(intent_tokens(text)))
+
+        vocabulary = set().union(*counts.values())
+        total_examples = sum(len(texts) for texts in examples.values())
+        for intent, texts in examples.items():
+            denominator = sum(counts[intent].values()) + len(vocabulary)
+            self.priors[intent] = math.log(len(texts) / total_examples)
+            self.likelihoods[intent] = {
+                feature: math.log((count + 1) / denominator) for feature, count in counts[intent].items()
+            }
+            self.unseen[intent] = math.log(1 / denominator)
+        self.vocabulary = vocabulary
+
+    def predict(self, tokens):
+        """Return (intent, posterior probability). Features never seen in training are ignored."""
+        features = [feature for feature in intent_features(tokens) if feature in self.vocabulary]
+        scores = {
+            intent: self.priors[intent] + sum(
+                self.likelihoods[intent].get(feature, self.unseen[intent]) for feature in features
+            )
+            for intent in self.priors
+        }
+        best = max(scores, key=scores.get)
+        total = sum(math.exp(score - scores[best]) for score in scores.values())
+        return best, 1 / total
+
+
+def load_training_examples(path):
+    examples = {intent: list(texts) for intent, texts in TRAINING_EXAMPLES.items()}
+    if path and os.path.exists(path):
+        with open(path) as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    if entry.get("intent") in examples:
+                        examples[entry["intent"]].append(entry["text"])
+    return examples
+
+
+def get_intent_model():
+    global _model
+
+    with _model_lock:
+        if _model is None:
+            _model = NaiveBayesIntentModel(load_training_examples(intent_settings_from_env()["training_path"]))
+        return _model
+
+
+def is_greeting(tokens):
+    if not all(token in GREETING_WORDS for token in tokens):
+        return False
+    return any(token in GREETING_CUES for token in tokens) or " ".join(tokens) in GREETING_PHRASES
+
+
+def is_schema_question(tokens, schema_vocabulary=()):
+    if any(pattern.search(" ".join(tokens)) for pattern in SCHEMA_PATTERNS):
+        return True
+    if not any(token in STRUCTURE_WORDS for token in tokens):
+        return False
+    return all(token in SCHEMA_WORDS or stem(token) in schema_vocabulary for token in tokens)
+
+
+def classify_intent(question, schema_vocabulary=(), threshold=0.8):
+    """
+    Classify a question as greeting, off_topic, schema or data. Returns (intent, confidence).
+
+    Token rules decide greetings and schema questions, and only when every word fits. The naive Bayes
+    model may route the rest away from the SQL agent only when it is at least threshold confident and the
+    question mentions no table, column or business word (our, total, sales, ...). Anything uncertain stays
+    data, so the worst case is a normal agent run.
+    """
+    tokens = intent_tokens(question)
+    if not tokens:
+        return OFF_TOPIC, 1.0
+
+    if is_greeting(tokens):
+        return GREETING, 1.0
+
+    if is_schema_question(tokens, schema_vocabulary):
+        return SCHEMA, 1.0
+
+    intent, confidence = get_intent_model().predict(tokens)
+    if intent == DATA or intent == SCHEMA or confidence < threshold:
+        return DATA, confidence
+    if any(stem(token) in schema_vocabulary or stem(token) in DATA_CUES for token in tokens):
+        return DATA, confidence
+    return intent, confidence
+
+
+def mentioned_tables(question, schema):
+    tokens = {stem(token) for token in intent_tokens(question)}
+    return [
+        table_name for table_name in schema["tables"]
+        if stem(table_name.lower()) in tokens or table_name.lower() in tokens
+    ]
+
+
+def render_schema_answer(question, schema):
+    """Answer a schema-only question from the cached schema, without an LLM call."""
+    tables = schema["tables"]
+    if not tables:
+        return "I couldn't find any tables in the connected database."
+
+    mentioned = mentioned_tables(question, schema)
+    if mentioned:
+        lines = []
+        for table_name in mentioned:
+            columns = ", ".join(f"{col['name']} ({col['type']})" for col in tables[table_name]["columns"])
+            lines.append(f"The {table_name} table has these columns: {columns}.")
+        return "\n".join(lines)
+
+    lines = [f"The database has {len(tables)} tables:"]
+    for table_name, table_info in tables.items():
+        lines.append(f"- {table_name} ({len(table_info['columns'])} columns)")
+    if schema["relationships"]:
+        links = ", ".join(
+            f"{rel['from_table']}.{rel['from_column']} -> {rel['to_table']}.{rel['to_column']}"
+            for rel in schema["relationships"]
+        )
+        lines.append(f"Relationships: {links}.")
+    return "\n".join(lines)
@@ -0,0 +1,153 @@
+import os
+import threading
+import httpx
+from dotenv import load_dotenv
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_groq import ChatGroq
+from backend.graph.stub_llm import StubChatModel
+from backend.utils.metrics import registry
+from backend.utils.tracing import set_span_attributes
+
+load_dotenv()
+
+DEFAULT_SQL_MODEL = "llama-3.1-8b-instant"
+DEFAULT_ANSWER_MODEL = "llama3-8b-8192"
+
+_clients = {}
+_clients_lock = threading.Lock()
+_http_clients = None
+
+llm_calls_total = registry.counter(
+    "sql_agent_llm_calls_total",
+    "Chat model calls by model"
+)
+llm_tokens_total = registry.counter(
+    "sql_agent_llm_tokens_total",
+    "Chat model tokens reported by the provider, by model and kind (input, output)"
+)
+
+
+class UnknownModelError(ValueError):
+    pass
+
+
+def allowed_models():
+    """The configured default models plus LLM_ALLOWED_MODELS (comma separated); requests may pick only these."""
+    extra = {name.strip() for name in os.getenv("LLM_ALLOWED_MODELS", "").split(",") if name.strip()}
+    return extra | {
+        os.getenv("LLM_SQL_MODEL", DEFAULT_SQL_MODEL),
+        os.getenv("LLM_ANSWER_MODEL", DEFAULT_ANSWER_MODEL)
+    }
+
+
+def check_model(model):
+    # Each model gets a cached client, so unlisted names would let callers grow the cache without bound
+    if model and model not in allowed_models():
+        raise UnknownModelError(f"Model {model} is not allowed; add it to LLM_ALLOWED_MODELS to use it")
+    return model
+
+
+def sql_model_name(model=None):
+    return check_model(model) or os.getenv("LLM_SQL_MODEL", DEFAULT_SQL_MODEL)
+
+
+def answer_model_name(model=None):
+    return check_model(model) or os.getenv("LLM_ANSWER_MODEL", DEFAULT_ANSWER_MODEL)
+
+
+def llm_provider():
+    return os.getenv("LLM_PROVIDER", "groq").lower()
+
+
+def http_settings_from_env():
+    return {
+        "max_connections": int(os.getenv("LLM_HTTP_MAX_CONNECTIONS", "100")),
+        "max_keepalive_connections": int(os.getenv("LLM_HTTP_MAX_KEEPALIVE", "20")),
+        "keepalive_expiry": float(os.getenv("LLM_HTTP_KEEPALIVE_EXPIRY", "60")),
+        "timeout": float(os.getenv("LLM_HTTP_TIMEOUT", "60"))
+    }
+
+
+def get_http_clients():
+    """Process-wide httpx clients shared by every chat model so TLS connections are kept alive and reused."""
+    global _http_clients
+
+    with _clients_lock:
+        if _http_clients is None:
+            settings = http_settings_from_env()
+            timeout = httpx.Timeout(settings.pop("timeout"), connect=10.0)
+            limits = httpx.Limits(**settings)
+            _http_clients = (
+                httpx.Client(limits=limits, timeout=timeout),
+                httpx.AsyncClient(limits=limits, timeout=timeout)
+            )
+        return _http_clients
+
+
+def build_groq_model(model, temperature=None, max_tokens=None):
+    http_client, http_async_client = get_http_clients()
+    settings = {"groq_api_key": os.getenv("GROQ_API_KEY"), "model_name": model}
+    if temperature is not None:
+        settings["temperature"] = temperature
+    if max_tokens is not None:
+        settings["max_tokens"] = max_tokens
+    return ChatGroq(http_client=http_client, http_async_client=http_async_client, **settings)
+
+
+def build_stub_model(model, temperature=None, max_tokens=None):
+    return StubChatModel(model_name=model)
+
+
+class UsageRecorder(BaseCallbackHandler):
+    """Counts calls and provider-reported token usage for one model, including streamed responses."""
+
+    run_inline = True
+
+    def __init__(self, model):
+        self.model = model
+
+    def on_llm_end(self, response, **kwargs):
+        llm_calls_total.inc(model=self.model)
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+                if not usage:
+                    continue
+                llm_tokens_total.inc(usage.get("input_tokens", 0), model=self.model, kind="input")
+                llm_tokens_total.inc(usage.get("output_tokens", 0), model=self.model, kind="output")
+                set_span_attributes(
+                    model=self.model,
+                    input_tokens=usage.get("input_tokens"),
+                    output_tokens=usage.get("output_tokens")
+                )
+
+
+PROVIDERS = {
+    "groq": build_groq_model,
+    "stub": build_stub_model
+}
+
+
+def get_chat_model(model, temperature=None, max_tokens=None, tools=None):
+    """
+    Return the chat model for this configuration from the LLM_PROVIDER backend, building it on first use.
+
+    Clients are cached per (provider, model, temperature, max_tokens, bound tools), so requests that pick
+    different models each reuse their own preconfigured client and the shared HTTP connection pool.
+    """
+    provider = llm_provider()
+    if provider not in PROVIDERS:
+        raise ValueError(f"Unknown LLM_PROVIDER {provider!r}; expected one of {', '.join(PROVIDERS)}")
+
+    key = (provider, model, temperature, max_tokens, tuple(tool.name for tool in tools or ()))
+
+    client = _clients.get(key)
+    if client is not None:
+        return client
+
+    client = PROVIDERS[provider](model, temperature, max_tokens)
+    client.callbacks = [UsageRecorder(model)]
+    if tools:
+        client = client.bind_tools(tools)
+    with _clients_lock:
+        return _clients.setdefault(key, client)
@@ -1,23 +1,73 @@
 import os
+import time
+import asyncio
+import logging
 from dotenv import load_dotenv
-from langchain_groq import ChatGroq
-from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
+from langchain_core.messages import HumanMessage, AIMessage, SystemMessage, ToolMessage
 from langgraph.graph import END
-from backend.graph.tools import execute_sql, get_database_schema
+from backend.graph.tools import (
+    execute_sql,
+    get_database_schema,
+    build_schema_context,
+    build_few_shot_examples,
+    discover_database_schema,
+    get_schema_index,
+    run_in_db_executor,
+    run_sql
+)
+from backend.graph.intent import (
+    GREETING,
+    SCHEMA,
+    DATA,
+    classify_intent,
+    intent_settings_from_env,
+    render_schema_answer
+)
+from backend.graph.schema_retrieval import estimate_tokens
+from backend.graph.llm import get_chat_model, sql_model_name
+from backend.utils.metrics import registry
+from backend.utils.timing import stage
+from backend.utils.tracing import set_span_attributes
+from backend.utils.concurrency import llm_slot
+from backend.utils.config import env_flag
 
 load_dotenv()
 
-llm = ChatGroq(
-    groq_api_key=os.getenv("GROQ_API_KEY"),
-    model_name="llama-3.1-8b-instant",
-    temperature=0.0,
-    max_tokens=1000
+logger = logging.getLogger(__name__)
+
+schema_tokens_total = registry.counter(
+    "sql_agent_schema_tokens_total",
+    "Estimated schema prompt tokens, full schema vs. sent to the model after pruning"
+)
+stops_total = registry.counter(
+    "sql_agent_agent_stops_total",
+    "Agent runs cut short by a spent budget, by reason (max_iterations, max_tokens, deadline)"
+)
+intent_total = registry.counter(
+    "sql_agent_intent_total",
+    "Questions by classified intent (greeting, off_topic, schema, data)"
+)
+tool_calls_total = registry.counter(
+    "sql_agent_tool_calls_total",
+    "Agent tool calls by tool and status (ok, error)"
 )
 
 tools = [get_database_schema, execute_sql]
-llm_with_tools = llm.bind_tools(tools)
+tools_by_name = {tool.name: tool for tool in tools}
+
+query_requirements = """CRITICAL QUERY REQUIREMENTS:
+- When asked about "customers", always include customer names (first_name, last_name) by joining with the customers table
+- When asked about "products", always include product names by joining with the products table  
+- When asked about "orders", include relevant details like order_date, total_amount
+- Always provide meaningful, human-readable results, not just IDs
+- When using GROUP BY with JOINs, include all non-aggregate columns in the GROUP BY clause"""
+
+example_patterns = """EXAMPLE PATTERNS:
+- Customers with multiple orders: SELECT c.first_name, c.last_name, COUNT(o.order_id) FROM customers c JOIN orders o ON c.customer_id = o.customer_id GROUP BY c.customer_id, c.first_name, c.last_name HAVING COUNT(o.order_id) > 1"""
 
-system_message = SystemMessage(content="""You are a SQL expert assistant. When answering questions about data:
+closing_reminder = "Remember: Always provide the final answer based on the actual query results, not just the query itself."
+
+system_prompt = f"""You are a SQL expert assistant. When answering questions about data:
 
 WORKFLOW:
 1. ALWAYS start by using the get_database_schema tool to understand the database structure
@@ -27,23 +77,91 @@ WORKFLOW:
 5. Generate efficient SQL queries based on the discovered schema
 6. ALWAYS execute the SQL query using execute_sql tool and provide the actual results
 
-CRITICAL QUERY REQUIREMENTS:
-- When asked about "customers", always include customer names (first_name, last_name) by joining with the customers table
-- When asked about "products", always include product names by joining with the products table  
-- When asked about "orders", include relevant details like order_date, total_amount
-- Always provide meaningful, human-readable results, not just IDs
-- When using GROUP BY with JOINs, include all non-aggregate columns in the GROUP BY clause
+{query_requirements}
 
 WORKFLOW RULES:
 - Call get_database_schema ONLY ONCE at the beginning to understand the structure
 - After getting the schema, immediately proceed to execute_sql with your query
 - Do NOT call get_database_schema multiple times for the same question
-- Be consistent in your approach for similar questions
+- Be consistent in your approach for similar questions"""
+
+preinjected_system_prompt = f"""You are a SQL expert assistant. When answering questions about data:
+
+WORKFLOW:
+1. The database schema relevant to the question is included below, so there is no need to look it up
+2. Pay careful attention to which table contains which columns and their relationships
+3. Use proper JOINs when data spans multiple tables based on foreign key relationships
+4. Use the exact table and column names shown in the schema
+5. Immediately call the execute_sql tool with an efficient SQL query and provide the actual results
+
+{query_requirements}"""
 
-EXAMPLE PATTERNS:
-- Customers with multiple orders: SELECT c.first_name, c.last_name, COUNT(o.order_id) FROM customers c JOIN orders o ON c.customer_id = o.customer_id GROUP BY c.customer_id, c.first_name, c.last_name HAVING COUNT(o.order_id) > 1
+def schema_preinject_enabled():
+    return env_flag("SCHEMA_PREINJECT", False)
 
-Remember: Always provide the final answer based on the actual query results, not just the query itself.""")
+def agent_budget_from_env():
+    """Per-question limits on the agent loop; 0 disables a limit."""
+    return {
+        "max_iterations": int(os.getenv("AGENT_MAX_ITERATIONS", "8")),
+        "max_tokens": int(os.getenv("AGENT_MAX_TOKENS", "50000")),
+        "deadline_seconds": float(os.getenv("AGENT_DEADLINE_SECONDS", "60"))
+    }
+
+def start_budget(settings=None):
+    settings = settings or agent_budget_from_env()
+    seconds = settings["deadline_seconds"]
+    return {
+        "max_iterations": settings["max_iterations"],
+        "max_tokens": settings["max_tokens"],
+        "deadline": time.monotonic() + seconds if seconds > 0 else None
+    }
+
+def budget_exhausted(state):
+    """Return the name of the first spent budget (max_iterations, max_tokens, deadline), or None."""
+    budget = state.get("budget") or {}
+    if budget.get("max_iterations") and state.get("iterations", 0) >= budget["max_iterations"]:
+        return "max_iterations"
+    if budget.get("max_tokens") and state.get("llm_tokens", 0) >= budget["max_tokens"]:
+        return "max_tokens"
+    if budget.get("deadline") and time.monotonic() >= budget["deadline"]:
+        return "deadline"
+    return None
+
+def remaining_seconds(state):
+    deadline = (state.get("budget") or {}).get("deadline")
+    return None if deadline is None else max(0.0, deadline - time.monotonic())
+
+def response_tokens(messages, response):
+    usage = getattr(response, "usage_metadata", None)
+    if usage and usage.get("total_tokens"):
+        return usage["total_tokens"]
+    return sum(estimate_tokens(str(msg.content)) for msg in messages) + estimate_tokens(str(response.content))
+
+STOP_MESSAGES = {
+    "max_iterations": "the limit of model turns for one question",
+    "max_tokens": "the LLM token budget for one question",
+    "deadline": "the time limit for one question"
+}
+
+def stop_early(state, reason):
+    """End the loop without another LLM call, answering with the latest successful query result if there is one."""
+    stops_total.inc(reason=reason)
+    set_span_attributes(stop_reason=reason)
+    logger.warning(
+        "Agent stopped after %d turns and %d tokens: %s",
+        state.get("iterations", 0), state.get("llm_tokens", 0), reason
+    )
+    
+    partial = next(
+        (msg for msg in reversed(state["messages"])
+         if isinstance(msg, ToolMessage) and msg.name == execute_sql.name and msg.status != "error"),
+        None
+    )
+    if partial is not None:
+        content = f"Stopped early after reaching {STOP_MESSAGES[reason]}. Latest query result:\n{partial.content}"
+    else:
+        content = f"Stopped early after reaching {STOP_MESSAGES[reason]} before any query succeeded."
+    return {"messages": [AIMessage(content=content)], "stop_reason": reason}
 
 def should_continue(state):
     messages = state["messages"]
@@ -53,36 +171,192 @@ def should_continue(state):
         return "tools"
     return END
 
-def call_model(state):
-    messages = state["messages"]
+def run_tool_call(tool_call, question):
+    name = tool_call["name"]
+    updates = {}
+    status = "ok"
     
-    if not any(isinstance(msg, SystemMessage) for msg in messages):
-        messages = [system_message] + messages
+    try:
+        if name == get_database_schema.name:
+            content, stats = build_schema_context(question)
+            updates["schema_stats"] = stats
+            record_schema_stats(stats)
+        elif name == execute_sql.name:
+            execution = run_sql(tool_call["args"].get("sql_query", ""))
+            content = execution.pop("result")
+            updates["queries"] = [execution]
+            if execution["error"]:
+                status = "error"
+        elif name in tools_by_name:
+            content = tools_by_name[name].invoke(tool_call["args"])
+        else:
+            content = f"Error: unknown tool {name}"
+            status = "error"
+    except Exception as e:
+        content = f"Error running {name}: {str(e)}"
+        status = "error"
     
-    response = llm_with_tools.invoke(messages)
-    return {"messages": [response]}
+    tool_calls_total.inc(tool=name if name in tools_by_name else "unknown", status=status)
+    tool_status = "error" if status == "error" else "success"
+    return ToolMessage(content=str(content), name=name, tool_call_id=tool_call["id"], status=tool_status), updates
 
-def check_greeting_or_irrelevant(state):
+def call_tools(state):
+    messages = state["messages"]
+    question = state.get("question") or latest_question(messages)
+    
+    results = [run_tool_call(tool_call, question) for tool_call in messages[-1].tool_calls]
+    return merge_tool_results(results)
+
+async def acall_tools(state):
     messages = state["messages"]
-    if not messages:
-        return state
-        
+    question = state.get("question") or latest_question(messages)
+    
+    results = [
+        await run_in_db_executor(run_tool_call, tool_call, question)
+        for tool_call in messages[-1].tool_calls
+    ]
+    return merge_tool_results(results)
+
+def merge_tool_results(results):
+    merged = {"messages": [], "queries": []}
+    for tool_message, updates in results:
+        merged["messages"].append(tool_message)
+        merged["queries"].extend(updates.pop("queries", []))
+        merged.update(updates)
+    return merged
+
+def record_schema_stats(stats):
+    schema_tokens_total.inc(stats["full_tokens"], kind="full")
+    schema_tokens_total.inc(stats["sent_tokens"], kind="sent")
+    logger.info(
+        "Schema context: %d/%d tables, %d tokens sent, %d saved",
+        stats["tables_sent"], stats["tables_total"], stats["sent_tokens"], stats["saved_tokens"]
+    )
+
+def latest_question(messages):
     human_messages = [msg for msg in messages if isinstance(msg, HumanMessage)]
-    if not human_messages:
-        return state
-        
-    question = human_messages[-1].content.lower().strip()
+    return human_messages[-1].content if human_messages else ""
+
+def preinject_requested(state):
+    preinject = state.get("preinject_schema")
+    return schema_preinject_enabled() if preinject is None else preinject
+
+def load_schema_context(state):
+    schema_context, stats = build_schema_context(state.get("question") or latest_question(state["messages"]))
+    record_schema_stats(stats)
+    return {"schema_context": schema_context, "schema_stats": stats}
+
+def load_few_shot_examples(state):
+    question = state.get("question") or latest_question(state["messages"])
+    try:
+        return {"few_shot": build_few_shot_examples(question)}
+    except Exception as e:
+        logger.warning("Few-shot examples unavailable: %s", e)
+        return {"few_shot": ""}
+
+def examples_section(few_shot):
+    if few_shot:
+        return f"SIMILAR QUESTIONS ANSWERED BEFORE (reuse their joins and filters where they fit):\n{few_shot}"
+    return example_patterns
+
+def model_messages(state, preinject, schema_context, few_shot):
+    messages = state["messages"]
     
-    greetings = ['hello', 'hi', 'hey', 'good morning', 'good afternoon', 'good evening', 'how are you']
+    if not any(isinstance(msg, SystemMessage) for msg in messages):
+        prompt = preinjected_system_prompt if preinject else system_prompt
+        content = f"{prompt}\n\n{examples_section(few_shot)}\n\n{closing_reminder}"
+        if preinject:
+            content = f"{content}\n\n{schema_context}"
+        messages = [SystemMessage(content=content)] + messages
+    
+    return messages
+
+def tool_model(state, preinject):
+    return get_chat_model(
+        sql_model_name(state.get("sql_model")),
+        temperature=0.0,
+        max_tokens=1000,
+        tools=[execute_sql] if preinject else tools
+    )
+
+def call_model(state):
+    reason = budget_exhausted(state)
+    if reason:
+        return stop_early(state, reason)
+    
+    preinject = preinject_requested(state)
+    updates = {}
+    
+    if preinject and state.get("schema_context") is None:
+        updates = load_schema_context(state)
+    if state.get("few_shot") is None:
+        updates.update(load_few_shot_examples(state))
+    
+    model = tool_model(state, preinject)
+    schema_context = updates.get("schema_context", state.get("schema_context"))
+    few_shot = updates.get("few_shot", state.get("few_shot"))
+    messages = model_messages(state, preinject, schema_context, few_shot)
+    with stage("llm"):
+        response = model.invoke(messages)
+    return {"messages": [response], "iterations": 1, "llm_tokens": response_tokens(messages, response), **updates}
+
+async def acall_model(state):
+    reason = budget_exhausted(state)
+    if reason:
+        return stop_early(state, reason)
+    
+    preinject = preinject_requested(state)
+    updates = {}
     
-    irrelevant_patterns = ['weather', 'joke', 'story', 'recipe', 'movie', 'music', 'sports', 'news']
+    if preinject and state.get("schema_context") is None:
+        updates = await run_in_db_executor(load_schema_context, state)
+    if state.get("few_shot") is None:
+        updates.update(await run_in_db_executor(load_few_shot_examples, state))
     
-    if any(greeting in question for greeting in greetings):
-        response = AIMessage(content="Hello! I'm a SQL agent specialized in database queries. Please ask me questions about your data and I'll help you write and execute SQL queries.")
-        return {"messages": [response]}
+    model = tool_model(state, preinject)
+    schema_context = updates.get("schema_context", state.get("schema_context"))
+    few_shot = updates.get("few_shot", state.get("few_shot"))
+    messages = model_messages(state, preinject, schema_context, few_shot)
+    try:
+        async with llm_slot():
+            with stage("llm"):
+                # The async path can also abandon an in-flight LLM call once the deadline passes
+                response = await asyncio.wait_for(model.ainvoke(messages), remaining_seconds(state))
+    except asyncio.TimeoutError:
+        return {**stop_early(state, "deadline"), **updates}
+    return {"messages": [response], "iterations": 1, "llm_tokens": response_tokens(messages, response), **updates}
+
+GREETING_RESPONSE = "Hello! I'm a SQL agent specialized in database queries. Please ask me questions about your data and I'll help you write and execute SQL queries."
+OFF_TOPIC_RESPONSE = "I'm a SQL agent and can only help with database queries and data analysis. Please ask me questions about your data."
+
+def check_greeting_or_irrelevant(state):
+    """
+    Route greetings, off-topic and schema-only questions to canned or schema-rendered replies so they never
+    reach the LLM. Sets "intent"; anything but data ends the graph (see route_input).
+    """
+    messages = state["messages"]
+    settings = intent_settings_from_env()
+    if not messages or not settings["enabled"]:
+        return {"intent": DATA}
     
-    if any(pattern in question for pattern in irrelevant_patterns) or len(question) < 3:
-        response = AIMessage(content="I'm a SQL agent and can only help with database queries and data analysis. Please ask me questions about your data.")
-        return {"messages": [response]}
+    question = state.get("question") or latest_question(messages)
+    schema = discover_database_schema()
+    intent, confidence = classify_intent(question, get_schema_index(schema).vocabulary, settings["threshold"])
+    intent_total.inc(intent=intent)
+    logger.debug("Intent %s (%.2f) for %r", intent, confidence, question)
     
-    return state
\ No newline at end of file
+    if intent == DATA:
+        return {"intent": intent}
+    if intent == GREETING:
+        response = GREETING_RESPONSE
+    elif intent == SCHEMA:
+        response = render_schema_answer(question, schema)
+    else:
+        response = OFF_TOPIC_RESPONSE
+    return {"messages": [AIMessage(content=response)], "intent": intent}
+
+async def acheck_greeting_or_irrelevant(state):
+    return await run_in_db_executor(check_greeting_or_irrelevant, state)
+
+def route_input(state):
+    return "agent" if state.get("intent", DATA) == DATA else END
@@ -0,0 +1,152 @@
+import os
+import re
+import math
+from collections import Counter
+from backend.utils.config import env_flag
+
+STOPWORDS = {
+    "a", "an", "the", "of", "in", "on", "for", "to", "by", "with", "from", "and", "or", "is", "are",
+    "was", "were", "be", "what", "which", "who", "whom", "how", "many", "much", "show", "me", "list",
+    "give", "get", "find", "all", "each", "every", "per", "that", "this", "these", "those", "there",
+    "do", "does", "did", "have", "has", "had", "i", "we", "you", "it", "its", "their", "my", "our",
+    "top", "most", "least", "more", "less", "than", "number", "count", "total", "average", "avg",
+    "sum", "max", "min", "please", "can", "could", "would", "tell", "about", "at", "as", "into",
+}
+
+TABLE_NAME_BOOST = 3
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+
+def estimate_tokens(text):
+    return max(1, len(text) // 4) if text else 0
+
+
+def stem(token):
+    if len(token) > 4 and token.endswith("ies"):
+        return token[:-3] + "y"
+    if token.endswith("sses"):
+        return token[:-2]
+    if len(token) > 4 and token.endswith(("xes", "ches", "shes")):
+        return token[:-2]
+    if len(token) > 3 and token.endswith("s") and not token.endswith(("ss", "us", "is")):
+        return token[:-1]
+    return token
+
+
+def tokenize(text):
+    text = re.sub(r"([a-z])([A-Z])", r"\1 \2", text)
+    words = re.findall(r"[a-z0-9]+", text.lower())
+    return [stem(word) for word in words if word not in STOPWORDS]
+
+
+class SchemaIndex:
+    def __init__(self, schema):
+        self.schema = schema
+        self.documents = {}
+        self.column_tokens = {}
+
+        for table_name, table_info in schema["tables"].items():
+            tokens = tokenize(table_name) * TABLE_NAME_BOOST
+            self.column_tokens[table_name] = {}
+            for col in table_info["columns"]:
+                col_tokens = tokenize(col["name"])
+                self.column_tokens[table_name][col["name"]] = set(col_tokens)
+                tokens.extend(col_tokens)
+            self.documents[table_name] = Counter(tokens)
+
+        self.doc_lengths = {table: sum(counts.values()) for table, counts in self.documents.items()}
+        self.avg_length = (sum(self.doc_lengths.values()) / len(self.doc_lengths)) if self.doc_lengths else 0.0
+
+        document_frequency = Counter()
+        for counts in self.documents.values():
+            document_frequency.update(counts.keys())
+        self.vocabulary = set(document_frequency)
+
+        total = len(self.documents)
+        self.idf = {
+            term: math.log(1 + (total - freq + 0.5) / (freq + 0.5))
+            for term, freq in document_frequency.items()
+        }
+
+        self.neighbours = {table: set() for table in schema["tables"]}
+        for rel in schema["relationships"]:
+            if rel["from_table"] in self.neighbours and rel["to_table"] in self.neighbours:
+                self.neighbours[rel["from_table"]].add(rel["to_table"])
+                self.neighbours[rel["to_table"]].add(rel["from_table"])
+
+    def score(self, query_terms):
+        scores = {}
+        for table, counts in self.documents.items():
+            score = 0.0
+            length_norm = 1 - BM25_B + BM25_B * self.doc_lengths[table] / (self.avg_length or 1)
+            for term in query_terms:
+                freq = counts.get(term)
+                if freq:
+                    score += self.idf[term] * freq * (BM25_K1 + 1) / (freq + BM25_K1 * length_norm)
+            if score > 0:
+                scores[table] = score
+        return scores
+
+
+def pruning_settings_from_env():
+    return {
+        "enabled": env_flag("SCHEMA_PRUNING", True),
+        "top_k": int(os.getenv("SCHEMA_PRUNE_TOP_K", "5")),
+        "max_tables": int(os.getenv("SCHEMA_PRUNE_MAX_TABLES", "10")),
+        "max_columns": int(os.getenv("SCHEMA_PRUNE_MAX_COLUMNS", "25")),
+    }
+
+
+def prune_schema(schema, question, top_k=5, max_tables=10, max_columns=25, index=None):
+    """
+    Select the tables and columns relevant to a question.
+
+    Tables are ranked with BM25 over table and column name tokens, the top_k hits are expanded
+    with their foreign-key neighbours (up to max_tables), and tables wider than max_columns keep
+    only key columns and columns matching the question. Returns the full schema when nothing matches.
+    Pass the schema's cached SchemaIndex as index to avoid rebuilding it.
+    """
+    if len(schema["tables"]) <= top_k:
+        return schema
+
+    index = index or SchemaIndex(schema)
+    query_terms = set(tokenize(question))
+    scores = index.score(query_terms)
+    if not scores:
+        return schema
+
+    ranked = sorted(scores, key=lambda table: (-scores[table], table))[:top_k]
+    selected = list(ranked)
+    for table in ranked:
+        for neighbour in sorted(index.neighbours[table]):
+            if len(selected) >= max_tables:
+                break
+            if neighbour not in selected:
+                selected.append(neighbour)
+
+    selected_set = set(selected)
+    relationships = [
+        rel for rel in schema["relationships"]
+        if rel["from_table"] in selected_set and rel["to_table"] in selected_set
+    ]
+
+    key_columns = {}
+    for rel in relationships:
+        key_columns.setdefault(rel["from_table"], set()).add(rel["from_column"])
+        key_columns.setdefault(rel["to_table"], set()).add(rel["to_column"])
+
+    tables = {}
+    for table in selected:
+        table_info = schema["tables"][table]
+        columns = table_info["columns"]
+        if len(columns) > max_columns:
+            keep = set(table_info.get("primary_key", [])) | key_columns.get(table, set())
+            columns = [
+                col for col in columns
+                if col["name"] in keep
+                or index.column_tokens[table][col["name"]] & (query_terms | {"name", "title"})
+            ]
+        tables[table] = {**table_info, "columns": columns}
+
+    return {"tables": tables, "relationships": relationships}
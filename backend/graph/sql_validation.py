@@ -0,0 +1,390 @@
+import re
+import difflib
+from backend.utils.result_cache import normalize_sql, is_read_only
+from backend.utils.config import env_flag
+
+TOKEN_PATTERN = re.compile(r"""
+    (?P<space>\s+)
+  | (?P<comment>--[^\n]*|/\*.*?\*/)
+  | (?P<string>[eEbBxXnN]?'(?:[^']|'')*')
+  | (?P<dollar>\$(?P<tag>[A-Za-z_]*)\$.*?\$(?P=tag)\$)
+  | (?P<quoted>"(?:[^"]|"")*")
+  | (?P<backtick>`[^`]*`)
+  | (?P<number>(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)
+  | (?P<param>\$\d+|%s)
+  | (?P<word>[A-Za-z_][A-Za-z0-9_$]*)
+  | (?P<op>::|<>|!=|<=|>=|\|\||[-+*/%<>=~!@#^&|?]+|[(),;.\[\]:])
+""", re.S | re.X)
+
+KEYWORDS = {
+    "all", "and", "any", "array", "as", "asc", "asymmetric", "at", "between", "bigint", "bool", "boolean", "both",
+    "by", "case", "cast", "char", "character", "collate", "cross", "cube", "current", "current_date",
+    "current_time", "current_timestamp", "current_user", "date", "day", "decimal", "default", "delete",
+    "desc", "distinct", "double", "dow", "doy", "else", "end", "epoch", "escape", "except", "exists",
+    "extract", "false", "fetch", "filter", "first", "float", "following", "for", "from", "full",
+    "group", "grouping", "having", "hour", "ilike", "in", "inner", "insert", "int", "integer",
+    "intersect", "interval", "into", "is", "isnull", "join", "last", "lateral", "leading", "left",
+    "like", "limit", "localtime", "localtimestamp", "minute", "month", "natural", "next", "not",
+    "notnull", "null", "nulls", "numeric", "of", "offset", "on", "only", "or", "order", "outer",
+    "over", "partition", "preceding", "precision", "quarter", "range", "real", "recursive", "returning",
+    "right", "rollup", "row", "rows", "second", "select", "session_user", "set", "sets", "similar",
+    "smallint", "some", "symmetric", "table", "text", "then", "ties", "time", "timestamp", "to", "trailing", "true",
+    "unbounded", "union", "unknown", "update", "using", "values", "varchar", "varying", "week", "when", "where",
+    "window", "with", "within", "without", "year", "zone"
+}
+
+# PostgreSQL's reserved key words (including those that can only be function or type names); a column
+# with one of these names has to stay quoted
+RESERVED_WORDS = {
+    "all", "analyse", "analyze", "and", "any", "array", "as", "asc", "asymmetric", "authorization", "binary",
+    "both", "case", "cast", "check", "collate", "collation", "column", "concurrently", "constraint", "create",
+    "cross", "current_catalog", "current_date", "current_role", "current_schema", "current_time",
+    "current_timestamp", "current_user", "default", "deferrable", "desc", "distinct", "do", "else", "end",
+    "except", "false", "fetch", "for", "foreign", "freeze", "from", "full", "grant", "group", "having", "ilike",
+    "in", "initially", "inner", "intersect", "into", "is", "isnull", "join", "lateral", "leading", "left", "like",
+    "limit", "localtime", "localtimestamp", "natural", "not", "notnull", "null", "offset", "on", "only", "or",
+    "order", "outer", "overlaps", "placing", "primary", "references", "returning", "right", "select",
+    "session_user", "similar", "some", "symmetric", "system_user", "table", "tablesample", "then", "to",
+    "trailing", "true", "union", "unique", "user", "using", "variadic", "verbose", "when", "where", "window",
+    "with"
+}
+
+IDENTIFIER_KINDS = {"word", "quoted", "backtick"}
+QUERY_STARTS = {"select", "with", "values", "table"}
+
+
+def tokenize_sql(sql):
+    tokens = []
+    for match in TOKEN_PATTERN.finditer(sql):
+        kind = match.lastgroup if match.lastgroup != "tag" else "dollar"
+        if kind in ("space", "comment"):
+            continue
+        text = match.group()
+        lower = text.lower() if kind == "word" else text
+        tokens.append({"kind": kind, "text": text, "start": match.start(), "end": match.end(), "lower": lower})
+    return tokens
+
+
+def identifier_name(token):
+    if token["kind"] == "quoted":
+        return token["text"][1:-1].replace('""', '"')
+    if token["kind"] == "backtick":
+        return token["text"][1:-1]
+    return token["lower"]
+
+
+def render_identifier(name):
+    if re.fullmatch(r"[a-z_][a-z0-9_]*", name) and name not in KEYWORDS and name not in RESERVED_WORDS:
+        return name
+    return '"' + name.replace('"', '""') + '"'
+
+
+def resolve_name(name, candidates):
+    """Exact match, else a unique match ignoring case, else a unique match ignoring case and underscores."""
+    if name in candidates:
+        return name
+    for fold in (str.lower, lambda value: value.lower().replace("_", "")):
+        matches = [candidate for candidate in candidates if fold(candidate) == fold(name)]
+        if len(matches) == 1:
+            return matches[0]
+    return None
+
+
+def did_you_mean(name, candidates):
+    matches = difflib.get_close_matches(name.lower(), list(candidates), n=3, cutoff=0.6)
+    return f" Did you mean {', '.join(matches)}?" if matches else ""
+
+
+class _Statement:
+    def __init__(self, sql, schema, default_schema):
+        self.sql = sql
+        self.tables = schema["tables"]
+        self.default_schema = default_schema
+        self.tokens = tokenize_sql(sql)
+        self.errors = []
+        self.fixes = []
+        self.replacements = {}
+        self.skip = set()
+        self.aliases = {}
+        self.scope = []
+        self.opaque = False
+
+    def is_identifier(self, index):
+        return index < len(self.tokens) and self.tokens[index]["kind"] in IDENTIFIER_KINDS
+
+    def text(self, index):
+        return self.tokens[index]["lower"] if index < len(self.tokens) else ""
+
+    def matching_paren(self, index):
+        depth = 0
+        for position in range(index, len(self.tokens)):
+            if self.tokens[position]["text"] == "(":
+                depth += 1
+            elif self.tokens[position]["text"] == ")":
+                depth -= 1
+                if depth == 0:
+                    return position
+        return len(self.tokens) - 1
+
+    def replace(self, index, name, description):
+        token = self.tokens[index]
+        # Quotes the model wrote around the right name stay; they may be what keeps it from parsing as a key word
+        if token["kind"] == "quoted" and identifier_name(token) == name:
+            return
+        rendered = render_identifier(name)
+        if rendered != token["text"] and self.replacements.get(index) != rendered:
+            self.replacements[index] = rendered
+            self.fixes.append(f"{description} {token['text']} -> {rendered}")
+
+    def is_keyword(self, index):
+        return self.tokens[index]["kind"] == "word" and self.tokens[index]["lower"] in KEYWORDS
+
+    def cte_names(self):
+        names = set()
+        for index, token in enumerate(self.tokens):
+            if not self.is_identifier(index) or self.text(index - 1) not in ("with", "recursive", ","):
+                continue
+            position = index + 1
+            if self.text(position) == "(":
+                position = self.matching_paren(position) + 1
+            if self.text(position) == "as" and self.text(position + 1) == "(":
+                names.add(identifier_name(token))
+        return names
+
+    def table_clause_positions(self):
+        # FROM inside EXTRACT(... FROM ...), SUBSTRING or TRIM is not a table clause
+        query_parens = []
+        for index, token in enumerate(self.tokens):
+            if token["text"] == "(":
+                query_parens.append(self.text(index + 1) in QUERY_STARTS)
+            elif token["text"] == ")" and query_parens:
+                query_parens.pop()
+            elif token["kind"] == "word" and token["lower"] in ("from", "join"):
+                if (not query_parens or query_parens[-1]) and self.text(index - 1) != "distinct":
+                    yield index, token["lower"]
+
+    def parse_reference(self, index):
+        while self.text(index) in ("lateral", "only"):
+            index += 1
+
+        reference = {"parts": [], "tokens": [], "alias": None, "derived": False}
+        if self.text(index) == "(":
+            reference["derived"] = True
+            index = self.matching_paren(index) + 1
+        elif self.is_identifier(index):
+            reference["tokens"].append(index)
+            index += 1
+            while self.text(index) == "." and self.is_identifier(index + 1):
+                reference["tokens"].append(index + 1)
+                index += 2
+            reference["parts"] = [identifier_name(self.tokens[position]) for position in reference["tokens"]]
+            if self.text(index) == "(":
+                reference["derived"] = True
+                index = self.matching_paren(index) + 1
+        else:
+            return None, index
+
+        if self.text(index) == "as":
+            index += 1
+        if self.is_identifier(index) and not self.is_keyword(index):
+            reference["alias"] = index
+            index += 1
+            if self.text(index) == "(":
+                index = self.matching_paren(index) + 1
+        return reference, index
+
+    def collect_references(self, cte_names):
+        for index, clause in self.table_clause_positions():
+            position = index + 1
+            while True:
+                reference, position = self.parse_reference(position)
+                if reference is None:
+                    break
+                self.skip.update(reference["tokens"])
+                if reference["alias"] is not None:
+                    self.skip.add(reference["alias"])
+                self.resolve_reference(reference, cte_names)
+                if clause != "from" or self.text(position) != ",":
+                    break
+                position += 1
+
+    def resolve_reference(self, reference, cte_names):
+        alias = identifier_name(self.tokens[reference["alias"]]) if reference["alias"] is not None else None
+        parts = reference["parts"]
+        table = None
+
+        if reference["derived"] or len(parts) > 2 or (len(parts) == 2 and parts[0] != self.default_schema):
+            self.opaque = True
+        elif parts[-1] in cte_names:
+            self.opaque = True
+        else:
+            name = parts[-1]
+            table = resolve_name(name, self.tables)
+            if table is None:
+                self.opaque = True
+                if not name.startswith("pg_") and len(parts) == 1:
+                    self.errors.append(f'Table "{name}" does not exist.{did_you_mean(name, self.tables)}')
+            else:
+                self.replace(reference["tokens"][-1], table, "table")
+                self.scope.append(table)
+
+        if parts:
+            self.aliases[parts[-1]] = table
+            if table:
+                self.aliases[table] = table
+        if alias:
+            self.aliases[alias] = table
+
+    def columns(self, table):
+        return [column["name"] for column in self.tables[table]["columns"]]
+
+    def tables_with_column(self, name, tables):
+        return [table for table in tables if resolve_name(name, self.columns(table))]
+
+    def dotted_name_end(self, index):
+        while self.text(index + 1) == "." and self.is_identifier(index + 2):
+            index += 2
+        return index
+
+    def skip_non_columns(self):
+        """Words that are never column references: EXTRACT fields, collation names and type names after ::."""
+        for index, token in enumerate(self.tokens):
+            if token["kind"] == "word" and token["lower"] == "extract" and self.text(index + 1) == "(":
+                self.skip.add(index + 2)
+            elif (token["kind"] == "word" and token["lower"] == "collate") or token["text"] == "::":
+                if self.is_identifier(index + 1):
+                    self.skip.update(range(index + 1, self.dotted_name_end(index + 1) + 1))
+
+    def check_qualified_columns(self):
+        for index in range(len(self.tokens) - 2):
+            if index in self.skip or not self.is_identifier(index) or self.text(index - 1) == ".":
+                continue
+            if self.text(index + 1) != "." or (not self.is_identifier(index + 2) and self.text(index + 2) != "*"):
+                continue
+
+            # schema.table.column: checked like table.column when the schema is the one the agent was shown
+            if self.text(index + 3) == "." and (self.is_identifier(index + 4) or self.text(index + 4) == "*"):
+                self.skip.update((index, index + 2, index + 4))
+                if self.text(index + 5) == "(" or identifier_name(self.tokens[index]) != self.default_schema:
+                    continue
+                index += 2
+            elif self.text(index + 3) == "(":
+                continue
+
+            self.skip.update((index, index + 2))
+            qualifier = identifier_name(self.tokens[index])
+            if qualifier not in self.aliases:
+                known = ", ".join(sorted(self.aliases)) or "none"
+                self.errors.append(f'Table or alias "{qualifier}" is not in the FROM clause (available: {known}).')
+                continue
+
+            table = self.aliases[qualifier]
+            if table is None or self.text(index + 2) == "*":
+                continue
+
+            name = identifier_name(self.tokens[index + 2])
+            column = resolve_name(name, self.columns(table))
+            if column:
+                self.replace(index + 2, column, "column")
+                continue
+
+            message = f'Column {qualifier}.{name} does not exist on table {table}.'
+            elsewhere = [other for other in self.tables_with_column(name, set(self.scope)) if other != table]
+            if elsewhere:
+                message += f" It exists on {', '.join(elsewhere)}."
+            else:
+                message += did_you_mean(name, self.columns(table))
+            self.errors.append(message)
+
+    def is_alias_position(self, index):
+        previous = self.tokens[index - 1] if index else None
+        if previous is None:
+            return False
+        if previous["lower"] in ("as", "over", "window"):
+            return True
+        if previous["kind"] in ("number", "string", "dollar", "quoted", "backtick") or previous["text"] == ")":
+            return True
+        return previous["kind"] == "word" and previous["lower"] not in KEYWORDS
+
+    def check_unqualified_columns(self):
+        if self.opaque or not self.scope:
+            return
+
+        output_aliases = {
+            identifier_name(self.tokens[index]) for index in range(len(self.tokens))
+            if self.is_identifier(index) and self.is_alias_position(index)
+        }
+        candidates = sorted({column for table in self.scope for column in self.columns(table)})
+
+        for index, token in enumerate(self.tokens):
+            if index in self.skip or not self.is_identifier(index) or self.is_keyword(index):
+                continue
+            if self.text(index + 1) in ("(", ".") or self.text(index - 1) in ("::", "."):
+                continue
+            if self.is_alias_position(index):
+                continue
+
+            name = identifier_name(token)
+            if name in output_aliases or name in self.aliases:
+                continue
+
+            column = resolve_name(name, candidates)
+            if column:
+                self.replace(index, column, "column")
+                continue
+
+            # A bare word that resembles no column may be syntax this checker does not know; let the database decide
+            elsewhere = self.tables_with_column(name, self.tables)
+            suggestion = did_you_mean(name, candidates)
+            if not elsewhere and not suggestion and token["kind"] == "word":
+                continue
+
+            message = f'Column "{name}" does not exist on {", ".join(self.scope)}.'
+            if elsewhere:
+                message += f" It exists on {', '.join(elsewhere)}, which is not in the FROM clause."
+            else:
+                message += suggestion
+            self.errors.append(message)
+
+    def rewritten_sql(self):
+        sql = self.sql
+        for index in sorted(self.replacements, reverse=True):
+            token = self.tokens[index]
+            sql = sql[:token["start"]] + self.replacements[index] + sql[token["end"]:]
+        return sql
+
+
+def validate_sql(sql, schema, default_schema="public", read_only=True):
+    """
+    Check a statement against the cached schema before it reaches the database.
+
+    Rejects anything but read-only statements when read_only is set, and verifies table and column
+    names referenced in the statement. Identifiers that only differ in case, quoting or underscores are
+    rewritten to the schema's spelling. Only names the checker is sure about are rejected; anything it
+    cannot place is left for the database. Returns (sql, errors, fixes); sql includes the fixes.
+    """
+    if read_only and not is_read_only(normalize_sql(sql)):
+        return sql, ["Only read-only statements (SELECT, WITH, VALUES, SHOW) are allowed; DDL and DML are rejected."], []
+
+    if not schema or not schema.get("tables"):
+        return sql, [], []
+
+    statement = _Statement(sql, schema, default_schema)
+    for index, token in enumerate(statement.tokens):
+        if token["kind"] == "backtick":
+            statement.replace(index, identifier_name(token), "quoting")
+
+    statement.collect_references(statement.cte_names())
+    statement.skip_non_columns()
+    statement.check_qualified_columns()
+    statement.check_unqualified_columns()
+
+    return statement.rewritten_sql(), statement.errors, statement.fixes
+
+
+def sql_validation_enabled():
+    return env_flag("SQL_VALIDATION", True)
+
+
+def sql_read_only():
+    return env_flag("SQL_READ_ONLY", True)
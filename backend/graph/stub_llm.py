@@ -0,0 +1,136 @@
+import os
+import re
+import json
+import time
+import asyncio
+import threading
+from typing import List
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, HumanMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from backend.graph.schema_retrieval import estimate_tokens
+
+_recordings = {}
+_recordings_lock = threading.Lock()
+
+
+def stub_settings_from_env():
+    return {
+        "latency": float(os.getenv("LLM_STUB_LATENCY", "0.2")),
+        "recording": os.getenv("LLM_STUB_RECORDING"),
+        "default_sql": os.getenv("LLM_STUB_SQL", "SELECT 1")
+    }
+
+
+def normalize_question(question):
+    return " ".join(question.lower().split())
+
+
+def load_recording(path):
+    """Read a JSON lines recording of {"question", "sql", "answer"} objects, keyed by normalized question."""
+    with _recordings_lock:
+        if path not in _recordings:
+            entries = {}
+            if path and os.path.exists(path):
+                with open(path) as f:
+                    for line in f:
+                        if line.strip():
+                            entry = json.loads(line)
+                            entries[normalize_question(entry["question"])] = entry
+            _recordings[path] = entries
+        return _recordings[path]
+
+
+def record_interaction(question, sql, answer):
+    path = os.getenv("LLM_RECORD_PATH")
+    if not path:
+        return
+
+    with _recordings_lock:
+        with open(path, "a") as f:
+            f.write(json.dumps({"question": question, "sql": sql, "answer": answer}) + "\n")
+        _recordings.pop(path, None)
+
+
+class StubChatModel(BaseChatModel):
+    """
+    Offline stand-in for the chat model. Replays recorded SQL and answers per question and otherwise
+    follows the agent's tool protocol: look up the schema (when the tool is bound), run one SQL statement,
+    then return its result. Every call sleeps for LLM_STUB_LATENCY seconds.
+    """
+
+    model_name: str = "stub"
+    tool_names: List[str] = []
+
+    @property
+    def _llm_type(self):
+        return "stub"
+
+    def bind_tools(self, tools, **kwargs):
+        return StubChatModel(
+            model_name=self.model_name,
+            tool_names=[tool.name for tool in tools],
+            callbacks=self.callbacks
+        )
+
+    def respond(self, messages):
+        settings = stub_settings_from_env()
+        recording = load_recording(settings["recording"])
+
+        if self.tool_names:
+            human_messages = [msg for msg in messages if isinstance(msg, HumanMessage)]
+            question = human_messages[-1].content if human_messages else ""
+            entry = recording.get(normalize_question(question), {})
+            called = {msg.name for msg in messages if isinstance(msg, ToolMessage)}
+            call_id = f"call_{len(messages)}"
+
+            if "get_database_schema" in self.tool_names and "get_database_schema" not in called:
+                return AIMessage(content="", tool_calls=[
+                    {"name": "get_database_schema", "args": {"query": question}, "id": call_id}
+                ])
+            if "execute_sql" not in called:
+                return AIMessage(content="", tool_calls=[
+                    {"name": "execute_sql", "args": {"sql_query": entry.get("sql", settings["default_sql"])}, "id": call_id}
+                ])
+            return AIMessage(content=[msg.content for msg in messages if isinstance(msg, ToolMessage)][-1])
+
+        prompt = messages[-1].content if messages else ""
+        asked = re.search(r"User asked: (.*)", prompt)
+        entry = recording.get(normalize_question(asked.group(1)), {}) if asked else {}
+        if "answer" in entry:
+            return AIMessage(content=entry["answer"])
+        result = re.search(r"Database result: (.*?)\n\s*\n", prompt, re.S)
+        return AIMessage(content=f"Result: {result.group(1).strip() if result else prompt}")
+
+    def usage(self, messages, message):
+        """Estimated token usage, so token metrics move with the stub too."""
+        input_tokens = sum(estimate_tokens(str(msg.content)) for msg in messages)
+        output_tokens = estimate_tokens(str(message.content) + json.dumps(message.tool_calls))
+        return {"input_tokens": input_tokens, "output_tokens": output_tokens, "total_tokens": input_tokens + output_tokens}
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        time.sleep(stub_settings_from_env()["latency"])
+        message = self.respond(messages)
+        message.usage_metadata = self.usage(messages, message)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        await asyncio.sleep(stub_settings_from_env()["latency"])
+        message = self.respond(messages)
+        message.usage_metadata = self.usage(messages, message)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        await asyncio.sleep(stub_settings_from_env()["latency"])
+        message = self.respond(messages)
+        usage = self.usage(messages, message)
+        if message.tool_calls:
+            yield ChatGenerationChunk(message=AIMessageChunk(content="", usage_metadata=usage, tool_call_chunks=[
+                {"name": call["name"], "args": json.dumps(call["args"]), "id": call["id"], "index": index}
+                for index, call in enumerate(message.tool_calls)
+            ]))
+            return
+        pieces = re.findall(r"\S+\s*", message.content) or [""]
+        for index, piece in enumerate(pieces):
+            last = index == len(pieces) - 1
+            yield ChatGenerationChunk(message=AIMessageChunk(content=piece, usage_metadata=usage if last else None))
@@ -1,122 +1,220 @@
 import os
+import time
+import uuid
+import asyncio
+import threading
+import contextvars
+import logging
+from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
 import psycopg2
+import psycopg2.errors
 from dotenv import load_dotenv
 from langchain.tools import tool
+from backend.utils.connection_pool import pool_settings_from_env
+from backend.utils.db_registry import current_database
+from backend.graph.schema_retrieval import SchemaIndex, prune_schema, pruning_settings_from_env, estimate_tokens
+from backend.graph.sql_validation import validate_sql, sql_validation_enabled, sql_read_only
+from backend.utils.result_cache import (
+    result_cache_enabled,
+    normalize_sql,
+    is_cacheable,
+    is_read_only,
+    supports_server_cursor
+)
+from backend.utils.result_store import result_store, result_limits_from_env, fetch_limited
+from backend.utils.result_set import ResultSet
+from backend.utils.metrics import registry
+from backend.utils.timing import stage
+from backend.utils.tracing import set_span_attributes
+from backend.utils.concurrency import db_slot
+from backend.utils.example_store import example_store, few_shot_settings_from_env
+from backend.utils.schema_cache import (
+    schema_cache_key,
+    fetch_schema_fingerprint,
+    load_cached_schema,
+    save_cached_schema
+)
 
 load_dotenv()
 
-_last_sql_query = None
-_schema_cache = None
+logger = logging.getLogger(__name__)
+
+_db_executor = None
+_db_executor_lock = threading.Lock()
+
+# Connections running statements for the current request, so they can be cancelled on disconnect
+active_connections = contextvars.ContextVar("active_connections", default=None)
+
+result_cache_total = registry.counter(
+    "sql_agent_result_cache_total",
+    "execute_sql result cache lookups by result (hit, miss)"
+)
+sql_validation_total = registry.counter(
+    "sql_agent_sql_validation_total",
+    "execute_sql statements checked against the cached schema by result (ok, fixed, rejected)"
+)
+sql_aborted_total = registry.counter(
+    "sql_agent_sql_aborted_total",
+    "execute_sql statements stopped by reason (rejected, canceled)"
+)
+sql_rows = registry.histogram(
+    "sql_agent_sql_rows",
+    "Rows returned by execute_sql statements, by whether they came from the result cache",
+    buckets=(0, 1, 10, 100, 1000, 10000, 100000)
+)
+schema_cache_total = registry.counter(
+    "sql_agent_schema_cache_total",
+    "Schema lookups by result (hit, revalidated, disk, introspected, error)"
+)
+
+class QueryRejectedError(Exception):
+    pass
 
 def get_database_connection():
-    dbname = os.getenv("DB_NAME")
-    user = os.getenv("DB_USER")
-    password = os.getenv("DB_PASS")
-    host = os.getenv("DB_HOST")
-    port = os.getenv("DB_PORT")
-    
-    if not all([dbname, user, password, host, port]):
-        missing = [var for var, val in [
-            ("DB_NAME", dbname), ("DB_USER", user), ("DB_PASS", password),
-            ("DB_HOST", host), ("DB_PORT", port)
-        ] if not val]
-        raise ValueError(f"Missing required environment variables: {', '.join(missing)}")
-    
-    return psycopg2.connect(
-        dbname=dbname,
-        user=user,
-        password=password,
-        host=host,
-        port=port,
-    )
+    return current_database().connect()
 
-def discover_database_schema():
-    global _schema_cache
-    
-    if _schema_cache:
-        return _schema_cache
-    
-    conn = get_database_connection()
-    cursor = conn.cursor()
-    
+SCHEMA_COLUMNS_QUERY = """
+    SELECT
+        c.relname,
+        a.attname,
+        format_type(a.atttypid, a.atttypmod),
+        CASE WHEN a.attnotnull THEN 'NO' ELSE 'YES' END,
+        pg_get_expr(d.adbin, d.adrelid)
+    FROM pg_catalog.pg_class c
+    JOIN pg_catalog.pg_namespace n ON n.oid = c.relnamespace
+    LEFT JOIN pg_catalog.pg_attribute a
+        ON a.attrelid = c.oid AND a.attnum > 0 AND NOT a.attisdropped
+    LEFT JOIN pg_catalog.pg_attrdef d
+        ON d.adrelid = a.attrelid AND d.adnum = a.attnum
+    WHERE n.nspname = %s
+        AND c.relkind IN ('r', 'p')
+        AND has_table_privilege(c.oid, 'SELECT, INSERT, UPDATE, DELETE, TRUNCATE, REFERENCES, TRIGGER')
+    ORDER BY c.relname, a.attnum
+"""
+
+SCHEMA_CONSTRAINTS_QUERY = """
+    SELECT
+        con.contype,
+        c.relname,
+        a.attname,
+        fc.relname,
+        fa.attname
+    FROM pg_catalog.pg_constraint con
+    JOIN pg_catalog.pg_class c ON c.oid = con.conrelid
+    JOIN pg_catalog.pg_namespace n ON n.oid = c.relnamespace
+    CROSS JOIN LATERAL unnest(con.conkey, con.confkey) WITH ORDINALITY AS k(attnum, fattnum, ord)
+    JOIN pg_catalog.pg_attribute a
+        ON a.attrelid = con.conrelid AND a.attnum = k.attnum
+    LEFT JOIN pg_catalog.pg_class fc ON fc.oid = con.confrelid
+    LEFT JOIN pg_catalog.pg_attribute fa
+        ON fa.attrelid = con.confrelid AND fa.attnum = k.fattnum
+    WHERE n.nspname = %s AND con.contype IN ('p', 'f')
+    ORDER BY c.relname, con.conname, k.ord
+"""
+
+def introspect_schema(cursor, schema_name):
     schema_info = {
         "tables": {},
         "relationships": []
     }
     
-    try:
-        schema_name = os.getenv("DB_SCHEMA", "public")
-        cursor.execute("""
-            SELECT table_name 
-            FROM information_schema.tables 
-            WHERE table_schema = %s AND table_type = 'BASE TABLE'
-        """, (schema_name,))
-        tables = [row[0] for row in cursor.fetchall()]
-        
-        for table in tables:
-            cursor.execute(f"""
-                SELECT column_name, data_type, is_nullable, column_default
-                FROM information_schema.columns
-                WHERE table_name = '{table}'
-                ORDER BY ordinal_position
-            """)
-            columns = cursor.fetchall()
-            schema_info["tables"][table] = {
-                "columns": [{"name": col[0], "type": col[1], "nullable": col[2], "default": col[3]} for col in columns]
-            }
-        
-        cursor.execute("""
-            SELECT
-                tc.table_name,
-                kcu.column_name,
-                ccu.table_name AS foreign_table_name,
-                ccu.column_name AS foreign_column_name
-            FROM information_schema.table_constraints AS tc
-            JOIN information_schema.key_column_usage AS kcu
-                ON tc.constraint_name = kcu.constraint_name
-                AND tc.table_schema = kcu.table_schema
-            JOIN information_schema.constraint_column_usage AS ccu
-                ON ccu.constraint_name = tc.constraint_name
-                AND ccu.table_schema = tc.table_schema
-            WHERE tc.constraint_type = 'FOREIGN KEY'
-        """)
-        
-        relationships = cursor.fetchall()
-        for rel in relationships:
+    cursor.execute(SCHEMA_COLUMNS_QUERY, (schema_name,))
+    for table, name, data_type, nullable, default in cursor.fetchall():
+        table_info = schema_info["tables"].setdefault(table, {"columns": [], "primary_key": []})
+        if name is not None:
+            table_info["columns"].append({"name": name, "type": data_type, "nullable": nullable, "default": default})
+    
+    cursor.execute(SCHEMA_CONSTRAINTS_QUERY, (schema_name,))
+    for kind, table, column, foreign_table, foreign_column in cursor.fetchall():
+        if kind == "p":
+            if table in schema_info["tables"]:
+                schema_info["tables"][table]["primary_key"].append(column)
+        else:
             schema_info["relationships"].append({
-                "from_table": rel[0],
-                "from_column": rel[1],
-                "to_table": rel[2],
-                "to_column": rel[3]
+                "from_table": table,
+                "from_column": column,
+                "to_table": foreign_table,
+                "to_column": foreign_column
             })
     
-    except Exception as e:
-        print(f"Error discovering schema: {e}")
-    
-    finally:
-        cursor.close()
-        conn.close()
-    
-    _schema_cache = schema_info
     return schema_info
 
-@tool("get_database_schema")
-def get_database_schema(query: str = "schema") -> str:
-    """
-    ALWAYS USE THIS TOOL FIRST! Discovers and returns the complete database schema including tables, columns, and relationships.
-    This is essential to understand the database structure before writing any SQL queries.
+def get_db_executor():
+    global _db_executor
     
-    Input: Any string (ignored, just for compatibility)
-    Output: Complete database schema information with tables, columns, and relationships
-    """
-    schema = discover_database_schema()
+    with _db_executor_lock:
+        if _db_executor is None:
+            _db_executor = ThreadPoolExecutor(
+                max_workers=pool_settings_from_env()["max_size"],
+                thread_name_prefix="db"
+            )
+        return _db_executor
+
+async def run_in_db_executor(func, *args):
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    async with db_slot():
+        return await loop.run_in_executor(get_db_executor(), lambda: context.run(func, *args))
+
+@stage("schema_discovery")
+def discover_database_schema():
+    try:
+        target = current_database()
+    except ValueError as e:
+        # No DB_* settings and no saved config: callers get an empty schema, as when the database is down
+        schema_cache_total.inc(result="error")
+        logger.error("Error discovering schema: %s", e)
+        return {"tables": {}, "relationships": []}
     
+    revalidate_interval = float(os.getenv("SCHEMA_REVALIDATE_INTERVAL", "60"))
+    if target.schema and time.monotonic() - target.schema_checked_at < revalidate_interval:
+        schema_cache_total.inc(result="hit")
+        return target.schema
+    
+    with target.schema_lock:
+        if target.schema and time.monotonic() - target.schema_checked_at < revalidate_interval:
+            schema_cache_total.inc(result="hit")
+            return target.schema
+        
+        try:
+            schema_name = target.schema_name
+            cache_key = schema_cache_key(target.params, schema_name)
+            
+            with target.get_pool().connection() as conn, conn.cursor() as cursor:
+                fingerprint = fetch_schema_fingerprint(cursor, schema_name)
+                result = "revalidated"
+                
+                if target.schema is None:
+                    cached = load_cached_schema(cache_key)
+                    if cached and cached["fingerprint"] == fingerprint:
+                        target.schema = cached["schema"]
+                        target.schema_fingerprint = fingerprint
+                        result = "disk"
+                
+                if target.schema is None or fingerprint != target.schema_fingerprint:
+                    target.schema = introspect_schema(cursor, schema_name)
+                    target.schema_fingerprint = fingerprint
+                    save_cached_schema(cache_key, fingerprint, target.schema)
+                    result = "introspected"
+            
+            target.schema_checked_at = time.monotonic()
+            schema_cache_total.inc(result=result)
+        except Exception as e:
+            schema_cache_total.inc(result="error")
+            logger.error("Error discovering schema: %s", e)
+    
+    return target.schema or {"tables": {}, "relationships": []}
+
+def render_schema_description(schema):
     schema_description = "DATABASE SCHEMA:\n\n"
     
     for table_name, table_info in schema["tables"].items():
         schema_description += f"Table: {table_name}\n"
+        primary_key = table_info.get("primary_key", [])
         for col in table_info["columns"]:
-            schema_description += f"  - {col['name']} ({col['type']})\n"
+            marker = ", primary key" if col["name"] in primary_key else ""
+            schema_description += f"  - {col['name']} ({col['type']}{marker})\n"
         schema_description += "\n"
     
     if schema["relationships"]:
@@ -151,45 +249,262 @@ def get_database_schema(query: str = "schema") -> str:
     
     return schema_description
 
-@tool("execute_sql", return_direct=True)
-def execute_sql(sql_query: str) -> str:
-    """
-    Executes a SQL query on the connected database and returns results.
+def get_schema_index(schema):
+    """The retrieval index for schema, cached on the current target so targets never rebuild each other's."""
+    try:
+        target = current_database()
+    except ValueError:
+        return SchemaIndex(schema)
     
-    IMPORTANT: Always use get_database_schema tool first to understand the database structure
-    before writing SQL queries. This ensures you use correct table names, column names, and relationships.
+    index = target.schema_index
+    if index is None or index.schema is not schema:
+        index = target.schema_index = SchemaIndex(schema)
+    return index
+
+@stage("schema")
+def build_schema_context(question=None):
+    target = current_database()
+    schema = discover_database_schema()
     
-    Input: SQL query as string (without backticks or markdown formatting).
-    Output: Query results as string.
+    rendered = target.schema_description
+    if rendered is None or rendered[0] is not schema:
+        rendered = target.schema_description = (schema, render_schema_description(schema))
+    full_description = rendered[1]
+    
+    settings = pruning_settings_from_env()
+    enabled = settings.pop("enabled")
+    pruned = prune_schema(schema, question, index=get_schema_index(schema), **settings) if enabled and question else schema
+    description = full_description if pruned is schema else render_schema_description(pruned)
+    
+    full_tokens = estimate_tokens(full_description)
+    sent_tokens = estimate_tokens(description)
+    stats = {
+        "tables_total": len(schema["tables"]),
+        "tables_sent": len(pruned["tables"]),
+        "full_tokens": full_tokens,
+        "sent_tokens": sent_tokens,
+        "saved_tokens": full_tokens - sent_tokens
+    }
+    
+    return description, stats
+
+def build_few_shot_examples(question):
+    """Render similar past question/SQL pairs that still validate against the current schema, within the token budget."""
+    settings = few_shot_settings_from_env()
+    if not settings["enabled"] or not question:
+        return ""
+
+    target = current_database()
+    schema = discover_database_schema()
+    matches = example_store.search(
+        get_database_identity(), question, settings["top_k"], settings["min_similarity"]
+    )
+
+    lines = []
+    budget = settings["max_tokens"]
+    for match in matches:
+        _, errors, _ = validate_sql(match["sql"], schema, target.schema_name, sql_read_only())
+        if errors:
+            continue
+        example = f"Q: {match['question']}\nSQL: {match['sql']}"
+        budget -= estimate_tokens(example)
+        if budget < 0:
+            break
+        lines.append(example)
+
+    return "\n\n".join(lines)
+
+@tool("get_database_schema")
+def get_database_schema(query: Optional[str] = None) -> str:
     """
-    global _last_sql_query
+    ALWAYS USE THIS TOOL FIRST! Discovers and returns the database schema including tables, columns, and relationships.
+    This is essential to understand the database structure before writing any SQL queries.
     
+    Input: The user's question, used to select the relevant tables (omit it for the complete schema)
+    Output: Database schema information with tables, columns, and relationships
+    """
+    return build_schema_context(query)[0]
+
+def query_guard_settings_from_env():
+    return {
+        "statement_timeout_ms": int(os.getenv("SQL_STATEMENT_TIMEOUT_MS", "30000")),
+        "max_cost": float(os.getenv("SQL_MAX_ESTIMATED_COST", "0")),
+        "max_rows": int(os.getenv("SQL_MAX_ESTIMATED_ROWS", "0"))
+    }
+
+def check_query_cost(cursor, query, max_cost, max_rows):
+    cursor.execute("EXPLAIN (FORMAT JSON) " + query)
+    plan = cursor.fetchone()[0][0]["Plan"]
+    
+    if max_cost and plan["Total Cost"] > max_cost:
+        return f"estimated cost {plan['Total Cost']:.0f} exceeds the limit of {max_cost:.0f}"
+    if max_rows and plan["Plan Rows"] > max_rows:
+        return f"estimated {plan['Plan Rows']} result rows exceed the limit of {max_rows}"
+    return None
+
+def track_active_queries():
+    active = set()
+    active_connections.set(active)
+    return active
+
+def cancel_active_queries(active):
+    for conn in list(active):
+        try:
+            conn.cancel()
+        except psycopg2.Error as e:
+            logger.warning("Error cancelling query: %s", e)
+
+@stage("sql")
+def run_sql(sql_query):
     cleaned_query = sql_query.strip()
     if cleaned_query.startswith('`') and cleaned_query.endswith('`'):
         cleaned_query = cleaned_query[1:-1].strip()
     
-    _last_sql_query = cleaned_query
+    started = time.perf_counter()
+    execution = {
+        "sql": cleaned_query,
+        "error": None,
+        "cached": False,
+        "columns": [],
+        "data": None,
+        "row_count": None,
+        "truncated": False,
+        "result_id": None
+    }
+    
+    # Catch unknown identifiers and writes locally instead of spending a database round trip
+    target = current_database()
+    schema = discover_database_schema() if sql_validation_enabled() else None
+    cleaned_query, errors, fixes = validate_sql(cleaned_query, schema, target.schema_name, sql_read_only())
+    execution["sql"] = cleaned_query
+    if errors:
+        sql_validation_total.inc(result="rejected")
+        execution["error"] = "SQL validation failed: " + " ".join(errors)
+        execution["result"] = f"Error executing query: {execution['error']}"
+        execution["duration_ms"] = (time.perf_counter() - started) * 1000
+        record_execution(execution)
+        return execution
+    sql_validation_total.inc(result="fixed" if fixes else "ok")
+    
+    normalized_query = normalize_sql(cleaned_query)
+    database = get_database_identity()
+    result_cache = target.result_cache
+    cacheable = result_cache_enabled() and is_cacheable(normalized_query)
+    limits = result_limits_from_env()
+    guard = query_guard_settings_from_env()
     
-    conn = get_database_connection()
-    cursor = conn.cursor()
+    if cacheable:
+        cached = result_cache.get(database, normalized_query)
+        if cached is not None:
+            result_cache_total.inc(result="hit")
+            payload = dict(cached)
+            size = payload.pop("size")
+            execution.update(payload, cached=True)
+            execution["result_id"] = result_store.put(execution["data"], size)
+            execution["duration_ms"] = (time.perf_counter() - started) * 1000
+            record_execution(execution)
+            return execution
+        result_cache_total.inc(result="miss")
+    
+    # Named cursors stream rows from the server in batches instead of buffering the whole result
+    server_cursor = supports_server_cursor(normalized_query)
+    active = active_connections.get()
+    conn = cursor = None
+    discard = False
+    size = 0
     
     try:
+        pool = target.get_pool()
+        conn = pool.getconn()
+        if active is not None:
+            active.add(conn)
+        if server_cursor:
+            cursor = conn.cursor(name=f"sql_agent_{uuid.uuid4().hex}")
+        else:
+            cursor = conn.cursor()
+        
+        with conn.cursor() as setup_cursor:
+            # SET LOCAL semantics: the timeout ends with the transaction the pool rolls back
+            setup_cursor.execute("SELECT set_config('statement_timeout', %s, true)", (str(guard["statement_timeout_ms"]),))
+            if server_cursor and (guard["max_cost"] or guard["max_rows"]):
+                reason = check_query_cost(setup_cursor, cleaned_query, guard["max_cost"], guard["max_rows"])
+                if reason:
+                    raise QueryRejectedError(
+                        f"Query rejected before execution: {reason}. Rewrite it with selective filters, "
+                        f"complete join conditions, aggregation or a LIMIT."
+                    )
+        
         cursor.execute(cleaned_query)
         try:
-            result = cursor.fetchall()
+            rows, size, truncated = fetch_limited(cursor, limits["max_rows"], limits["max_bytes"], limits["batch_size"])
+            data = ResultSet.from_rows(cursor.description, rows, truncated)
+            execution.update(columns=data.columns, data=data, row_count=data.row_count, truncated=truncated)
+            result = data.render_for_llm(limits["prompt_rows"])
         except psycopg2.ProgrammingError:
             result = "Query executed successfully, no results to fetch."
     except Exception as e:
-        result = f"Error executing query: {str(e)}"
+        discard = isinstance(e, (psycopg2.OperationalError, psycopg2.InterfaceError))
+        if isinstance(e, QueryRejectedError):
+            sql_aborted_total.inc(reason="rejected")
+        elif isinstance(e, psycopg2.errors.QueryCanceled):
+            sql_aborted_total.inc(reason="canceled")
+        # The DECLARE wrapper of a server-side cursor would only confuse the error position
+        diag = getattr(e, "diag", None)
+        execution["error"] = diag.message_primary if server_cursor and diag and diag.message_primary else str(e)
+        result = f"Error executing query: {execution['error']}"
     finally:
-        cursor.close()
-        conn.close()
+        if cursor is not None:
+            try:
+                cursor.close()
+            except psycopg2.Error:
+                discard = True
+        if conn is not None:
+            if active is not None:
+                active.discard(conn)
+            pool.putconn(conn, discard=discard)
+    
+    execution["result"] = result
+    
+    if execution["error"] is None:
+        if execution["data"] is not None:
+            execution["result_id"] = result_store.put(execution["data"], size)
+        if cacheable:
+            payload = {key: execution[key] for key in ("result", "columns", "data", "row_count", "truncated")}
+            result_cache.put(database, normalized_query, dict(payload, size=size), size)
+        elif not is_read_only(normalized_query):
+            result_cache.invalidate_scope(database)
+    
+    execution["duration_ms"] = (time.perf_counter() - started) * 1000
+    record_execution(execution)
+    return execution
+
+def record_execution(execution):
+    if execution["row_count"] is not None:
+        sql_rows.observe(execution["row_count"], cached=str(execution["cached"]).lower())
+    set_span_attributes(
+        rows=execution["row_count"],
+        cached=execution["cached"],
+        truncated=execution["truncated"],
+        error=execution["error"]
+    )
+
+@tool("execute_sql", return_direct=True)
+def execute_sql(sql_query: str) -> str:
+    """
+    Executes a SQL query on the connected database and returns results.
     
-    return str(result)
+    IMPORTANT: Always use get_database_schema tool first to understand the database structure
+    before writing SQL queries. This ensures you use correct table names, column names, and relationships.
+    
+    Input: SQL query as string (without backticks or markdown formatting).
+    Output: Query results as string.
+    """
+    return run_sql(sql_query)["result"]
 
-def get_last_sql_query():
-    return _last_sql_query
+def get_database_identity():
+    target = current_database()
+    return schema_cache_key(target.params, target.schema_name)
 
-def clear_schema_cache():
-    global _schema_cache
-    _schema_cache = None
+def get_schema_scope():
+    discover_database_schema()
+    return get_database_identity(), current_database().schema_fingerprint
@@ -1,6 +1,13 @@
-from backend.utils.db_manager import switch_database, get_current_database_info
+from backend.utils.db_manager import (
+    switch_database,
+    get_current_database_info,
+    add_database_target,
+    remove_database_target,
+    list_database_targets
+)
+from backend.utils.db_registry import using_database, UnknownDatabaseError
 from backend.graph.tools import get_database_schema
-from backend.schemas.database import DatabaseConfig
+from backend.schemas.database import DatabaseConfig, DatabaseTargetConfig
 
 def switch_database_interactor(config: DatabaseConfig):
     try:
@@ -18,9 +25,37 @@ def switch_database_interactor(config: DatabaseConfig):
 def get_current_database_interactor():
     return get_current_database_info()
 
-def get_database_schema_interactor():
+def list_database_targets_interactor():
+    return list_database_targets()
+
+def add_database_target_interactor(config: DatabaseTargetConfig):
+    try:
+        add_database_target(
+            name=config.name,
+            db_name=config.db_name,
+            db_user=config.db_user,
+            db_pass=config.db_pass,
+            db_host=config.db_host,
+            db_port=config.db_port,
+            db_schema=config.db_schema
+        )
+        return {"success": True, "message": f"Registered database target: {config.name}"}
+    except Exception as e:
+        return {"success": False, "error": f"Failed to register database target: {str(e)}"}
+
+def remove_database_target_interactor(name: str):
+    try:
+        remove_database_target(name)
+        return {"success": True, "message": f"Removed database target: {name}"}
+    except Exception as e:
+        return {"success": False, "error": f"Failed to remove database target: {str(e)}"}
+
+def get_database_schema_interactor(database: str = None):
     try:
-        schema = get_database_schema.invoke({"query": "schema"})
+        with using_database(database):
+            schema = get_database_schema.invoke({})
         return {"success": True, "schema": schema}
+    except UnknownDatabaseError as e:
+        return {"success": False, "error": str(e)}
     except Exception as e:
         return {"success": False, "error": f"Failed to get schema: {str(e)}"}
\ No newline at end of file
@@ -1,11 +1,250 @@
-from backend.graph.agent import run_agent
-from backend.graph.answer import generate_answer
-from backend.graph.tools import get_last_sql_query
-
-def process_user_query(question: str):
-    response = run_agent(question)
-    
-    sql_query = get_last_sql_query() or "UNKNOWN"
-    
-    answer = generate_answer(question, sql_query, response)
-    return sql_query, answer
+import os
+import asyncio
+import logging
+from langchain_core.messages import AIMessage
+from backend.graph.agent import run_agent, run_agent_async, astream_agent, final_response
+from backend.graph.answer import answer_question, aanswer_question, astream_answer
+from backend.graph.tools import (
+    get_schema_scope,
+    get_database_identity,
+    discover_database_schema,
+    run_in_db_executor,
+    run_sql
+)
+from backend.graph.stub_llm import record_interaction
+from backend.graph.intent import DATA
+from backend.utils.query_cache import question_cache, query_cache_enabled
+from backend.utils.example_store import example_store, few_shot_settings_from_env
+from backend.utils.db_registry import using_database, select_database
+from backend.utils.concurrency import concurrency_limits
+from backend.utils.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+query_cache_total = registry.counter(
+    "sql_agent_query_cache_total",
+    "Question-to-SQL cache lookups by result (exact, similar, miss, stale)"
+)
+
+STREAM_PREVIEW_ROWS = 50
+
+def _cache_scope(bypass_cache):
+    if not query_cache_enabled() or bypass_cache:
+        return None
+
+    try:
+        return get_schema_scope()
+    except Exception as e:
+        logger.warning("Question cache unavailable: %s", e)
+        return None
+
+def _lookup_cached_sql(scope, question):
+    if scope is None:
+        return None, None
+
+    cached_sql, match = question_cache.get(scope, question)
+    if not cached_sql:
+        query_cache_total.inc(result="miss")
+    return cached_sql, match
+
+def _accept_cached_result(scope, cached_sql, match, execution):
+    if execution["error"]:
+        question_cache.invalidate_sql(scope, cached_sql)
+        query_cache_total.inc(result="stale")
+        return False
+
+    query_cache_total.inc(result=match)
+    return True
+
+def _answered_directly(intent, stop_reason=None):
+    """
+    Greetings, off-topic and schema questions are answered in the graph; the answer LLM adds nothing.
+    Neither does it after the deadline ran out, when another LLM call would only add to the overrun.
+    """
+    return (intent is not None and intent != DATA) or stop_reason == "deadline"
+
+def _remember_sql(scope, question, queries, stop_reason=None):
+    if not queries:
+        return "UNKNOWN"
+
+    # A run cut short by its budget may not have reached the SQL the model meant to settle on
+    last_query = queries[-1]
+    if not last_query["error"] and stop_reason is None:
+        if scope is not None:
+            question_cache.put(scope, question, last_query["sql"])
+        if few_shot_settings_from_env()["enabled"]:
+            example_store.add(get_database_identity(), question, last_query["sql"])
+    return last_query["sql"]
+
+def process_user_query(question: str, bypass_cache: bool = False, sql_model: str = None, answer_model: str = None,
+                       database: str = None):
+    with using_database(database):
+        return _process_user_query(question, bypass_cache, sql_model, answer_model)
+
+def _process_user_query(question, bypass_cache, sql_model, answer_model):
+    scope = _cache_scope(bypass_cache)
+    queries = []
+
+    cached_sql, match = _lookup_cached_sql(scope, question)
+    if cached_sql:
+        execution = run_sql(cached_sql)
+        response = execution.pop("result")
+        queries.append(execution)
+        if _accept_cached_result(scope, cached_sql, match, execution):
+            answer = answer_question(question, cached_sql, response, execution, answer_model)
+            record_interaction(question, cached_sql, answer)
+            return cached_sql, answer, queries
+
+    response, agent_queries, intent, stop_reason = run_agent(question, sql_model=sql_model)
+    queries.extend(agent_queries)
+
+    sql_query = _remember_sql(scope, question, agent_queries, stop_reason)
+
+    if _answered_directly(intent, stop_reason):
+        record_interaction(question, sql_query, response)
+        return sql_query, response, queries
+
+    answer = answer_question(question, sql_query, response, agent_queries[-1] if agent_queries else None, answer_model)
+    record_interaction(question, sql_query, answer)
+    return sql_query, answer, queries
+
+async def process_user_query_async(question: str, bypass_cache: bool = False, sql_model: str = None,
+                                   answer_model: str = None, database: str = None):
+    with using_database(database):
+        return await _process_user_query_async(question, bypass_cache, sql_model, answer_model)
+
+async def _process_user_query_async(question, bypass_cache, sql_model, answer_model):
+    scope = await run_in_db_executor(_cache_scope, bypass_cache)
+    queries = []
+
+    cached_sql, match = _lookup_cached_sql(scope, question)
+    if cached_sql:
+        execution = await run_in_db_executor(run_sql, cached_sql)
+        response = execution.pop("result")
+        queries.append(execution)
+        if _accept_cached_result(scope, cached_sql, match, execution):
+            answer = await aanswer_question(question, cached_sql, response, execution, answer_model)
+            await asyncio.to_thread(record_interaction, question, cached_sql, answer)
+            return cached_sql, answer, queries
+
+    response, agent_queries, intent, stop_reason = await run_agent_async(question, sql_model=sql_model)
+    queries.extend(agent_queries)
+
+    # The example store writes to disk; keep that off the event loop
+    sql_query = await asyncio.to_thread(_remember_sql, scope, question, agent_queries, stop_reason)
+
+    if _answered_directly(intent, stop_reason):
+        await asyncio.to_thread(record_interaction, question, sql_query, response)
+        return sql_query, response, queries
+
+    answer = await aanswer_question(question, sql_query, response, agent_queries[-1] if agent_queries else None, answer_model)
+    await asyncio.to_thread(record_interaction, question, sql_query, answer)
+    return sql_query, answer, queries
+
+def batch_settings_from_env():
+    return {
+        "max_questions": int(os.getenv("BATCH_MAX_QUESTIONS", "500")),
+        "llm_concurrency": int(os.getenv("BATCH_LLM_CONCURRENCY", "8")),
+        "db_concurrency": int(os.getenv("BATCH_DB_CONCURRENCY", "4"))
+    }
+
+def _batch_key(question):
+    return " ".join(question.split()).lower()
+
+async def process_batch_async(questions, bypass_cache: bool = False, sql_model: str = None, answer_model: str = None,
+                              database: str = None):
+    """
+    Answer a list of questions concurrently, returning one (sql_query, answer, queries) tuple or exception per
+    question, in input order. Repeats (ignoring case and whitespace) run once and share their result.
+    """
+    settings = batch_settings_from_env()
+    unique = {}
+    for question in questions:
+        unique.setdefault(_batch_key(question), question)
+
+    with using_database(database), concurrency_limits(settings["llm_concurrency"], settings["db_concurrency"]):
+        # Load the schema once up front; every question after that reads the cached copy
+        await run_in_db_executor(discover_database_schema)
+        outcomes = await asyncio.gather(
+            *(_process_user_query_async(question, bypass_cache, sql_model, answer_model) for question in unique.values()),
+            return_exceptions=True
+        )
+
+    results = dict(zip(unique, outcomes))
+    return [results[_batch_key(question)] for question in questions]
+
+def _rows_event(execution):
+    data = execution["data"]
+    return {
+        "sql": execution["sql"],
+        **(data.slice(0, STREAM_PREVIEW_ROWS).to_dict() if data is not None else {"columns": [], "types": [], "data": []}),
+        "row_count": execution["row_count"],
+        "truncated": execution["truncated"],
+        "result_id": execution["result_id"],
+        "error": execution["error"],
+        "cached": execution["cached"],
+        "duration_ms": execution["duration_ms"]
+    }
+
+async def _stream_answer(question, sql_query, response, execution, queries, answer_model):
+    tokens = []
+    async for token in astream_answer(question, sql_query, response, execution, answer_model):
+        tokens.append(token)
+        yield "answer_token", {"token": token}
+    await asyncio.to_thread(record_interaction, question, sql_query, "".join(tokens))
+    yield "done", {"sql_query": sql_query, "answer": "".join(tokens), "queries": queries}
+
+async def stream_user_query(question: str, bypass_cache: bool = False, sql_model: str = None, answer_model: str = None,
+                            database: str = None):
+    # Not reset afterwards: a generator may be finalized in another context, and each stream runs in its own task
+    select_database(database)
+    scope = await run_in_db_executor(_cache_scope, bypass_cache)
+    queries = []
+
+    cached_sql, match = _lookup_cached_sql(scope, question)
+    if cached_sql:
+        yield "sql", {"sql": cached_sql, "cached": True}
+        execution = await run_in_db_executor(run_sql, cached_sql)
+        response = execution.pop("result")
+        queries.append(execution)
+        yield "rows", _rows_event(execution)
+        if _accept_cached_result(scope, cached_sql, match, execution):
+            async for event in _stream_answer(question, cached_sql, response, execution, queries, answer_model):
+                yield event
+            return
+
+    last_message = None
+    intent = None
+    stop_reason = None
+    agent_queries = []
+    async for node, update in astream_agent(question, sql_model=sql_model):
+        intent = update.get("intent", intent)
+        stop_reason = update.get("stop_reason", stop_reason)
+        if "schema_stats" in update:
+            yield "schema", update["schema_stats"]
+
+        for message in update.get("messages", []):
+            last_message = message
+            if isinstance(message, AIMessage):
+                for tool_call in message.tool_calls:
+                    if tool_call["name"] == "execute_sql":
+                        yield "sql", {"sql": tool_call["args"].get("sql_query", ""), "cached": False}
+
+        for execution in update.get("queries", []):
+            agent_queries.append(execution)
+            yield "rows", _rows_event(execution)
+
+    response = final_response({"messages": [last_message]})[0]
+    queries.extend(agent_queries)
+
+    sql_query = await asyncio.to_thread(_remember_sql, scope, question, agent_queries, stop_reason)
+
+    if _answered_directly(intent, stop_reason):
+        await asyncio.to_thread(record_interaction, question, sql_query, response)
+        yield "answer_token", {"token": response}
+        yield "done", {"sql_query": sql_query, "answer": response, "queries": queries}
+        return
+
+    execution = agent_queries[-1] if agent_queries else None
+    async for event in _stream_answer(question, sql_query, response, execution, queries, answer_model):
+        yield event
@@ -1,7 +1,10 @@
+from typing import List, Optional
 from fastapi import APIRouter
 from backend.schemas.database import (
     DatabaseConfig,
+    DatabaseTargetConfig,
     DatabaseInfo,
+    DatabaseTargetInfo,
     DatabaseSchema,
     ErrorResponse,
     SuccessResponse
@@ -9,7 +12,10 @@ from backend.schemas.database import (
 from backend.interactors.database import (
     switch_database_interactor,
     get_current_database_interactor,
-    get_database_schema_interactor
+    get_database_schema_interactor,
+    list_database_targets_interactor,
+    add_database_target_interactor,
+    remove_database_target_interactor
 )
 
 router = APIRouter()
@@ -32,9 +38,37 @@ def get_current_db():
 
 
 
+@router.get("/targets", response_model=List[DatabaseTargetInfo])
+def list_targets():
+    return list_database_targets_interactor()
+
+
+
+@router.post("/targets", response_model=SuccessResponse)
+def add_target(config: DatabaseTargetConfig):
+    result = add_database_target_interactor(config)
+    
+    if result["success"]:
+        return SuccessResponse(message=result["message"])
+    else:
+        return ErrorResponse(error=result["error"])
+
+
+
+@router.delete("/targets/{name}", response_model=SuccessResponse)
+def remove_target(name: str):
+    result = remove_database_target_interactor(name)
+    
+    if result["success"]:
+        return SuccessResponse(message=result["message"])
+    else:
+        return ErrorResponse(error=result["error"])
+
+
+
 @router.get("/schema", response_model=DatabaseSchema)
-def get_schema():
-    result = get_database_schema_interactor()
+def get_schema(database: Optional[str] = None):
+    result = get_database_schema_interactor(database)
     
     if result["success"]:
         return DatabaseSchema(schema_data=result["schema"])
@@ -1,10 +1,157 @@
-from fastapi import APIRouter
-from backend.schemas.query import QueryRequest, QueryResponse
-from backend.interactors.nlp import process_user_query
+import json
+import asyncio
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import Response, StreamingResponse
+from backend.schemas.query import (
+    QueryRequest,
+    QueryResponse,
+    BatchQueryRequest,
+    BatchQueryResult,
+    BatchQueryResponse,
+    ResultPage
+)
+from backend.interactors.nlp import (
+    process_user_query_async,
+    process_batch_async,
+    stream_user_query,
+    batch_settings_from_env
+)
+from backend.graph.tools import track_active_queries, cancel_active_queries
+from backend.utils.result_store import result_store
+from backend.utils.db_registry import database_registry, UnknownDatabaseError
+from backend.graph.llm import check_model, UnknownModelError
 
 router = APIRouter()
 
+DISCONNECT_POLL_INTERVAL = 0.5
+
+def format_sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(jsonable_encoder(data))}\n\n"
+
+async def run_until_disconnected(request, func, *args, **kwargs):
+    active = track_active_queries()
+    task = asyncio.create_task(func(*args, **kwargs))
+    
+    while True:
+        done, _ = await asyncio.wait({task}, timeout=DISCONNECT_POLL_INTERVAL)
+        if done:
+            return task.result()
+        if await request.is_disconnected():
+            task.cancel()
+            cancel_active_queries(active)
+            raise HTTPException(status_code=499, detail="Client disconnected")
+
+def require_database(name):
+    try:
+        database_registry.resolve_name(name)
+    except UnknownDatabaseError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+def require_models(query):
+    try:
+        check_model(query.sql_model)
+        check_model(query.answer_model)
+    except UnknownModelError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 @router.post("/ask", response_model=QueryResponse)
-def ask_db(query: QueryRequest):
-    sql_query, answer = process_user_query(query.question)
-    return QueryResponse(sql_query=sql_query, answer=answer)
+async def ask_db(query: QueryRequest, request: Request):
+    require_database(query.database)
+    require_models(query)
+    sql_query, answer, queries = await run_until_disconnected(
+        request,
+        process_user_query_async,
+        query.question,
+        bypass_cache=query.bypass_cache,
+        sql_model=query.sql_model,
+        answer_model=query.answer_model,
+        database=query.database
+    )
+    return QueryResponse(sql_query=sql_query, answer=answer, queries=queries)
+
+@router.post("/ask/batch", response_model=BatchQueryResponse)
+async def ask_db_batch(batch: BatchQueryRequest, request: Request):
+    require_database(batch.database)
+    require_models(batch)
+    max_questions = batch_settings_from_env()["max_questions"]
+    if len(batch.questions) > max_questions:
+        raise HTTPException(status_code=413, detail=f"A batch can hold at most {max_questions} questions")
+    
+    outcomes = await run_until_disconnected(
+        request,
+        process_batch_async,
+        batch.questions,
+        bypass_cache=batch.bypass_cache,
+        sql_model=batch.sql_model,
+        answer_model=batch.answer_model,
+        database=batch.database
+    )
+    
+    results = []
+    for question, outcome in zip(batch.questions, outcomes):
+        # gather() hands back a cancelled question's CancelledError, which is not an Exception
+        if isinstance(outcome, BaseException):
+            error = str(outcome) or type(outcome).__name__
+            results.append(BatchQueryResult(question=question, sql_query="", answer="", error=error))
+        else:
+            sql_query, answer, queries = outcome
+            results.append(BatchQueryResult(question=question, sql_query=sql_query, answer=answer, queries=queries))
+    return BatchQueryResponse(results=results)
+
+@router.post("/ask/stream")
+async def ask_db_stream(query: QueryRequest):
+    require_database(query.database)
+    require_models(query)
+    
+    async def events():
+        active = track_active_queries()
+        try:
+            async for event, data in stream_user_query(
+                query.question,
+                bypass_cache=query.bypass_cache,
+                sql_model=query.sql_model,
+                answer_model=query.answer_model,
+                database=query.database
+            ):
+                if event == "done":
+                    data = QueryResponse(**data).model_dump()
+                yield format_sse(event, data)
+        except asyncio.CancelledError:
+            cancel_active_queries(active)
+            raise
+        except Exception as e:
+            yield format_sse("error", {"error": str(e)})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.get("/results/{result_id}", response_model=ResultPage)
+def get_result_page(
+    result_id: str,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    format: str = Query("json", pattern="^(json|arrow)$")
+):
+    page = result_store.page(result_id, offset, limit)
+    if page is None:
+        raise HTTPException(status_code=404, detail="Result not found or expired")
+    
+    result_set, total_rows = page
+    if format == "arrow":
+        try:
+            return Response(content=result_set.to_arrow(), media_type="application/vnd.apache.arrow.stream")
+        except RuntimeError as e:
+            raise HTTPException(status_code=501, detail=str(e))
+    
+    return ResultPage(
+        result_id=result_id,
+        offset=offset,
+        limit=limit,
+        total_rows=total_rows,
+        truncated=result_set.truncated,
+        **result_set.to_dict()
+    )
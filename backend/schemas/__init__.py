@@ -7,22 +7,38 @@ across the different API endpoints.
 
 from .database import (
     DatabaseConfig,
+    DatabaseTargetConfig,
     DatabaseInfo,
+    DatabaseTargetInfo,
     DatabaseSchema,
     ErrorResponse,
     SuccessResponse
 )
 from .query import (
     QueryRequest,
-    QueryResponse
+    ResultData,
+    ExecutedQuery,
+    QueryResponse,
+    BatchQueryRequest,
+    BatchQueryResult,
+    BatchQueryResponse,
+    ResultPage
 )
 
 __all__ = [
     "DatabaseConfig",
+    "DatabaseTargetConfig",
     "DatabaseInfo", 
+    "DatabaseTargetInfo",
     "DatabaseSchema",
     "ErrorResponse",
     "SuccessResponse",
     "QueryRequest",
-    "QueryResponse"
+    "ResultData",
+    "ExecutedQuery",
+    "QueryResponse",
+    "BatchQueryRequest",
+    "BatchQueryResult",
+    "BatchQueryResponse",
+    "ResultPage"
 ]
\ No newline at end of file
@@ -8,12 +8,20 @@ class DatabaseConfig(BaseModel):
     db_host: Optional[str] = None
     db_port: Optional[int] = None
 
+class DatabaseTargetConfig(DatabaseConfig):
+    name: str
+    db_schema: Optional[str] = None
+
 class DatabaseInfo(BaseModel):
     host: str
     port: str
     user: str
     database: str
 
+class DatabaseTargetInfo(DatabaseInfo):
+    name: str
+    schema_name: str = Field(alias="schema")
+
 class DatabaseSchema(BaseModel):
     schema_data: str
 
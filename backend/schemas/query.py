@@ -1,8 +1,55 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict, Field
+from typing import Any, List, Optional
 
 class QueryRequest(BaseModel):
     question: str
+    bypass_cache: bool = False
+    sql_model: Optional[str] = None
+    answer_model: Optional[str] = None
+    database: Optional[str] = None
+
+class ResultData(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    columns: List[str]
+    types: List[str]
+    data: List[List[Any]]
+
+class ExecutedQuery(BaseModel):
+    sql: str
+    duration_ms: float
+    error: Optional[str] = None
+    cached: bool = False
+    result_id: Optional[str] = None
+    row_count: Optional[int] = None
+    truncated: bool = False
+    data: Optional[ResultData] = None
 
 class QueryResponse(BaseModel):
     sql_query: str
     answer: str
+    queries: List[ExecutedQuery] = []
+
+class BatchQueryRequest(BaseModel):
+    questions: List[str] = Field(min_length=1)
+    bypass_cache: bool = False
+    sql_model: Optional[str] = None
+    answer_model: Optional[str] = None
+    database: Optional[str] = None
+
+class BatchQueryResult(QueryResponse):
+    question: str
+    error: Optional[str] = None
+
+class BatchQueryResponse(BaseModel):
+    results: List[BatchQueryResult]
+
+class ResultPage(BaseModel):
+    result_id: str
+    columns: List[str]
+    types: List[str]
+    data: List[List[Any]]
+    offset: int
+    limit: int
+    total_rows: int
+    truncated: bool = False
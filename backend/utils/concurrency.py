@@ -0,0 +1,36 @@
+import asyncio
+import contextvars
+from contextlib import contextmanager, asynccontextmanager
+
+# Shared by every task started inside concurrency_limits(); unset means unlimited
+_llm_semaphore = contextvars.ContextVar("llm_semaphore", default=None)
+_db_semaphore = contextvars.ContextVar("db_semaphore", default=None)
+
+
+@contextmanager
+def concurrency_limits(llm=None, db=None):
+    """Cap concurrent LLM and DB calls for the tasks created in this context; 0 or None leaves a kind unlimited."""
+    llm_token = _llm_semaphore.set(asyncio.Semaphore(llm) if llm else None)
+    db_token = _db_semaphore.set(asyncio.Semaphore(db) if db else None)
+    try:
+        yield
+    finally:
+        _db_semaphore.reset(db_token)
+        _llm_semaphore.reset(llm_token)
+
+
+@asynccontextmanager
+async def _slot(semaphore):
+    if semaphore is None:
+        yield
+        return
+    async with semaphore:
+        yield
+
+
+def llm_slot():
+    return _slot(_llm_semaphore.get())
+
+
+def db_slot():
+    return _slot(_db_semaphore.get())
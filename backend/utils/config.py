@@ -0,0 +1,9 @@
+import os
+
+
+def env_flag(name, default=False):
+    """Read a boolean environment variable; 1, true and yes (any case) turn it on."""
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes")
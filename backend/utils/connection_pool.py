@@ -0,0 +1,212 @@
+import os
+import time
+import threading
+from contextlib import contextmanager
+import psycopg2
+
+
+class PoolTimeoutError(Exception):
+    pass
+
+
+class _PooledConnection:
+    __slots__ = ("conn", "created_at", "last_used_at")
+
+    def __init__(self, conn):
+        now = time.monotonic()
+        self.conn = conn
+        self.created_at = now
+        self.last_used_at = now
+
+
+class ConnectionPool:
+    """
+    Thread-safe pool of psycopg2 connections.
+
+    Connections are health-checked when borrowed after sitting idle, retired once they
+    exceed max_lifetime, and idle connections above min_size are evicted after idle_timeout.
+    """
+
+    def __init__(self, connect, min_size=1, max_size=10, max_lifetime=1800.0,
+                 idle_timeout=300.0, acquire_timeout=30.0, health_check_interval=30.0):
+        if max_size < 1 or min_size < 0 or min_size > max_size:
+            raise ValueError(f"Invalid pool size: min_size={min_size}, max_size={max_size}")
+
+        self._connect = connect
+        self.min_size = min_size
+        self.max_size = max_size
+        self.max_lifetime = max_lifetime
+        self.idle_timeout = idle_timeout
+        self.acquire_timeout = acquire_timeout
+        self.health_check_interval = health_check_interval
+
+        self._idle = []
+        self._in_use = {}
+        self._size = 0
+        self._closed = False
+        self._cond = threading.Condition()
+
+    def getconn(self):
+        deadline = time.monotonic() + self.acquire_timeout
+
+        while True:
+            with self._cond:
+                if self._closed:
+                    raise PoolTimeoutError("Connection pool is closed")
+
+                self._evict_idle_locked()
+
+                if self._idle:
+                    pooled = self._idle.pop()
+                elif self._size < self.max_size:
+                    self._size += 1
+                    pooled = None
+                else:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise PoolTimeoutError(
+                            f"Timed out after {self.acquire_timeout}s waiting for a database connection"
+                        )
+                    self._cond.wait(remaining)
+                    continue
+
+            if pooled is None:
+                try:
+                    pooled = _PooledConnection(self._connect())
+                except Exception:
+                    with self._cond:
+                        self._size -= 1
+                        self._cond.notify()
+                    raise
+            elif not self._is_usable(pooled):
+                self._discard(pooled)
+                continue
+
+            with self._cond:
+                self._in_use[id(pooled.conn)] = pooled
+            return pooled.conn
+
+    def putconn(self, conn, discard=False):
+        with self._cond:
+            pooled = self._in_use.pop(id(conn), None)
+
+        if pooled is None:
+            conn.close()
+            return
+
+        if not discard and not conn.closed:
+            try:
+                if conn.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+            except psycopg2.Error:
+                discard = True
+
+        if discard or conn.closed or self._expired(pooled) or self._closed:
+            self._discard(pooled)
+            return
+
+        pooled.last_used_at = time.monotonic()
+        with self._cond:
+            self._idle.append(pooled)
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self):
+        conn = self.getconn()
+        discard = False
+        try:
+            yield conn
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            discard = True
+            raise
+        finally:
+            self.putconn(conn, discard=discard)
+
+    def prefill(self):
+        """Open connections up to min_size so the first requests do not pay for the connect."""
+        conns = []
+        try:
+            for _ in range(self.min_size - len(self._idle)):
+                conns.append(self.getconn())
+        finally:
+            for conn in conns:
+                self.putconn(conn)
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._cond.notify_all()
+
+        for pooled in idle:
+            self._discard(pooled)
+
+    def stats(self):
+        with self._cond:
+            return {
+                "size": self._size,
+                "idle": len(self._idle),
+                "in_use": len(self._in_use),
+                "max_size": self.max_size,
+            }
+
+    def _expired(self, pooled):
+        return self.max_lifetime and time.monotonic() - pooled.created_at > self.max_lifetime
+
+    def _is_usable(self, pooled):
+        if pooled.conn.closed or self._expired(pooled):
+            return False
+
+        if time.monotonic() - pooled.last_used_at < self.health_check_interval:
+            return True
+
+        try:
+            with pooled.conn.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            pooled.conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def _evict_idle_locked(self):
+        if not self.idle_timeout:
+            return
+
+        now = time.monotonic()
+        keep = []
+        evicted = []
+        for pooled in self._idle:
+            if self._size - len(evicted) > self.min_size and now - pooled.last_used_at > self.idle_timeout:
+                evicted.append(pooled)
+            else:
+                keep.append(pooled)
+
+        if evicted:
+            self._idle = keep
+            self._size -= len(evicted)
+            for pooled in evicted:
+                self._close_quietly(pooled.conn)
+
+    def _discard(self, pooled):
+        self._close_quietly(pooled.conn)
+        with self._cond:
+            self._size -= 1
+            self._cond.notify()
+
+    @staticmethod
+    def _close_quietly(conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+
+def pool_settings_from_env():
+    return {
+        "min_size": int(os.getenv("DB_POOL_MIN_SIZE", "1")),
+        "max_size": int(os.getenv("DB_POOL_MAX_SIZE", "10")),
+        "max_lifetime": float(os.getenv("DB_POOL_MAX_LIFETIME", "1800")),
+        "idle_timeout": float(os.getenv("DB_POOL_IDLE_TIMEOUT", "300")),
+        "acquire_timeout": float(os.getenv("DB_POOL_TIMEOUT", "30")),
+        "health_check_interval": float(os.getenv("DB_POOL_HEALTH_CHECK_INTERVAL", "30")),
+    }
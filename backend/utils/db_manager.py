@@ -1,69 +1,103 @@
-import os
 import json
 from pathlib import Path
-from backend.graph.tools import clear_schema_cache
+from backend.utils.db_registry import database_registry, DEFAULT_DATABASE
 
 CONFIG_FILE = Path(__file__).parent.parent / "config" / "database_config.json"
+TARGETS_FILE = Path(__file__).parent.parent / "config" / "database_targets.json"
 
-def load_database_config():
+def load_database_config(path=CONFIG_FILE):
     try:
-        if CONFIG_FILE.exists():
-            with open(CONFIG_FILE, 'r') as f:
+        if path.exists():
+            with open(path, 'r') as f:
                 return json.load(f)
     except Exception as e:
         pass
     
     return None
 
-def save_database_config(config):
+def save_database_config(config, path=CONFIG_FILE):
     try:
-        CONFIG_FILE.parent.mkdir(parents=True, exist_ok=True)
+        path.parent.mkdir(parents=True, exist_ok=True)
         
-        with open(CONFIG_FILE, 'w') as f:
+        with open(path, 'w') as f:
             json.dump(config, f, indent=4)
     except Exception as e:
         pass
 
+def config_to_params(config):
+    return {
+        "dbname": config["db_name"],
+        "user": config["db_user"],
+        "password": config["db_pass"],
+        "host": config["db_host"],
+        "port": str(config["db_port"])
+    }
+
+def build_database_config(db_name, db_user=None, db_pass=None, db_host=None, db_port=None):
+    try:
+        defaults = database_registry.get(DEFAULT_DATABASE).params
+    except ValueError:
+        defaults = {}
+    
+    return {
+        "db_name": db_name,
+        "db_user": db_user or defaults.get("user") or "postgres",
+        "db_pass": db_pass or defaults.get("password") or "postgres",
+        "db_host": db_host or defaults.get("host") or "localhost",
+        "db_port": str(db_port) if db_port else str(defaults.get("port") or "5432")
+    }
+
 def apply_database_config():
     config = load_database_config()
     
     if config:
-        os.environ["DB_NAME"] = config["db_name"]
-        os.environ["DB_USER"] = config["db_user"] 
-        os.environ["DB_PASS"] = config["db_pass"]
-        os.environ["DB_HOST"] = config["db_host"]
-        os.environ["DB_PORT"] = config["db_port"]
-        return config
+        database_registry.register(DEFAULT_DATABASE, config_to_params(config))
     
-    return None
+    for name, target_config in (load_database_config(TARGETS_FILE) or {}).items():
+        database_registry.register(name, config_to_params(target_config), target_config.get("db_schema"))
+    
+    return config
 
 def switch_database(db_name, db_user=None, db_pass=None, db_host=None, db_port=None):
-    current_user = db_user or os.getenv("DB_USER", "postgres")
-    current_pass = db_pass or os.getenv("DB_PASS", "postgres")
-    current_host = db_host or os.getenv("DB_HOST", "localhost")
-    current_port = str(db_port) if db_port else os.getenv("DB_PORT", "5432")
+    """Point the default target at another database. Named targets and their caches are unaffected."""
+    config = build_database_config(db_name, db_user, db_pass, db_host, db_port)
+    save_database_config(config)
     
-    os.environ["DB_NAME"] = db_name
-    os.environ["DB_USER"] = current_user
-    os.environ["DB_PASS"] = current_pass
-    os.environ["DB_HOST"] = current_host
-    os.environ["DB_PORT"] = current_port
+    target = database_registry.register(DEFAULT_DATABASE, config_to_params(config))
+    target.clear_schema()
+    target.result_cache.clear()
+
+def add_database_target(name, db_name, db_user=None, db_pass=None, db_host=None, db_port=None, db_schema=None):
+    if name == DEFAULT_DATABASE:
+        raise ValueError(f"Use /database/switch to change the {DEFAULT_DATABASE} target")
     
-    config = {
-        "db_name": db_name,
-        "db_user": current_user,
-        "db_pass": current_pass,
-        "db_host": current_host,
-        "db_port": current_port
-    }
-    save_database_config(config)
+    config = build_database_config(db_name, db_user, db_pass, db_host, db_port)
+    if db_schema:
+        config["db_schema"] = db_schema
+    
+    targets = load_database_config(TARGETS_FILE) or {}
+    targets[name] = config
+    save_database_config(targets, TARGETS_FILE)
+    
+    return database_registry.register(name, config_to_params(config), db_schema)
+
+def remove_database_target(name):
+    if name == DEFAULT_DATABASE:
+        raise ValueError(f"The {DEFAULT_DATABASE} target cannot be removed")
+    
+    database_registry.remove(name)
     
-    clear_schema_cache()
+    targets = load_database_config(TARGETS_FILE) or {}
+    if targets.pop(name, None) is not None:
+        save_database_config(targets, TARGETS_FILE)
+
+def list_database_targets():
+    try:
+        database_registry.get(DEFAULT_DATABASE)
+    except ValueError:
+        pass
+    return [target.info() for target in database_registry.targets()]
 
 def get_current_database_info():
-    return {
-        "host": os.getenv("DB_HOST"),
-        "port": os.getenv("DB_PORT"),
-        "user": os.getenv("DB_USER"),
-        "database": os.getenv("DB_NAME")
-    }
\ No newline at end of file
+    info = database_registry.get(DEFAULT_DATABASE).info()
+    return {key: info[key] for key in ("host", "port", "user", "database")}
@@ -0,0 +1,224 @@
+import os
+import logging
+import threading
+import contextvars
+from contextlib import contextmanager
+import psycopg2
+from dotenv import load_dotenv
+from backend.utils.connection_pool import ConnectionPool, PoolTimeoutError, pool_settings_from_env
+from backend.utils.result_cache import ResultCache, result_cache_settings_from_env
+from backend.utils.metrics import registry
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+pool_connections = registry.gauge(
+    "sql_agent_db_pool_connections",
+    "Pooled connections per database target, by state (open, idle, in_use, max)"
+)
+
+DEFAULT_DATABASE = "default"
+
+# Target selected for the current request; run_in_db_executor copies it to DB threads with the rest of the context
+_current_database = contextvars.ContextVar("current_database", default=DEFAULT_DATABASE)
+
+
+class UnknownDatabaseError(LookupError):
+    pass
+
+
+class DatabaseTargetClosedError(RuntimeError):
+    pass
+
+
+def connection_params_from_env():
+    dbname = os.getenv("DB_NAME")
+    user = os.getenv("DB_USER")
+    password = os.getenv("DB_PASS")
+    host = os.getenv("DB_HOST")
+    port = os.getenv("DB_PORT")
+
+    if not all([dbname, user, password, host, port]):
+        missing = [var for var, val in [
+            ("DB_NAME", dbname), ("DB_USER", user), ("DB_PASS", password),
+            ("DB_HOST", host), ("DB_PORT", port)
+        ] if not val]
+        raise ValueError(f"Missing required environment variables: {', '.join(missing)}")
+
+    return {
+        "dbname": dbname,
+        "user": user,
+        "password": password,
+        "host": host,
+        "port": port,
+    }
+
+
+class DatabaseTarget:
+    """
+    A named database the agent can query, with the connection pool, schema cache and result cache that
+    belong to it, so targets never evict or invalidate each other's state.
+    """
+
+    def __init__(self, name, params, schema_name=None):
+        self.name = name
+        self.params = dict(params)
+        self.schema_name = schema_name or os.getenv("DB_SCHEMA", "public")
+        self.result_cache = ResultCache(**result_cache_settings_from_env())
+
+        # Owned by discover_database_schema / build_schema_context / get_schema_index in backend.graph.tools
+        self.schema = None
+        self.schema_fingerprint = None
+        self.schema_checked_at = 0.0
+        self.schema_description = None
+        self.schema_index = None
+        self.schema_lock = threading.Lock()
+
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        self._closed = False
+
+    def connect(self):
+        if self.schema_name == "public":
+            return psycopg2.connect(**self.params)
+        # Unqualified names in generated SQL must resolve in the schema the agent was shown
+        schema = '"' + self.schema_name.replace('"', '""') + '"'
+        return psycopg2.connect(**self.params, options=f"-c search_path={schema},public")
+
+    def get_pool(self):
+        with self._pool_lock:
+            # A caller still holding a replaced or removed target must not open a pool nothing will close
+            if self._closed:
+                raise DatabaseTargetClosedError(f"Database target {self.name} was replaced or removed; retry the request")
+            if self._pool is None:
+                self._pool = ConnectionPool(self.connect, **pool_settings_from_env())
+                try:
+                    self._pool.prefill()
+                except (psycopg2.Error, PoolTimeoutError) as e:
+                    # The pool still connects on demand; the failure surfaces on the query that needs it
+                    logger.warning("Could not prefill the pool for %s: %s", self.name, e)
+            return self._pool
+
+    def pool_stats(self):
+        with self._pool_lock:
+            pool = self._pool
+        if pool is None:
+            return {"size": 0, "idle": 0, "in_use": 0, "max_size": 0}
+        return pool.stats()
+
+    def clear_schema(self):
+        with self.schema_lock:
+            self.schema = None
+            self.schema_fingerprint = None
+            self.schema_checked_at = 0.0
+            self.schema_description = None
+            self.schema_index = None
+
+    def reset_pool(self):
+        """Close the current connections; the next get_pool() opens a fresh pool."""
+        with self._pool_lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.close()
+
+    def close(self):
+        with self._pool_lock:
+            self._closed = True
+        self.reset_pool()
+        self.result_cache.clear()
+
+    def info(self):
+        return {
+            "name": self.name,
+            "host": self.params.get("host"),
+            "port": str(self.params.get("port")),
+            "user": self.params.get("user"),
+            "database": self.params.get("dbname"),
+            "schema": self.schema_name
+        }
+
+
+class DatabaseRegistry:
+    """
+    Named database targets served side by side from one process. The default target is built from the
+    DB_* environment variables on first use unless it was registered explicitly.
+    """
+
+    def __init__(self):
+        self._targets = {}
+        self._lock = threading.Lock()
+
+    def register(self, name, params, schema_name=None):
+        """Add or replace a target. Re-registering identical settings keeps the existing pool and caches."""
+        target = DatabaseTarget(name, params, schema_name)
+        with self._lock:
+            previous = self._targets.get(name)
+            if previous is not None and (previous.params, previous.schema_name) == (target.params, target.schema_name):
+                return previous
+            self._targets[name] = target
+
+        if previous is not None:
+            previous.close()
+        return target
+
+    def remove(self, name):
+        with self._lock:
+            target = self._targets.pop(name, None)
+        if target is None:
+            raise UnknownDatabaseError(f"Unknown database target: {name}")
+        target.close()
+
+    def get(self, name=None):
+        name = name or DEFAULT_DATABASE
+        with self._lock:
+            target = self._targets.get(name)
+            if target is None and name == DEFAULT_DATABASE:
+                target = self._targets[name] = DatabaseTarget(name, connection_params_from_env())
+        if target is None:
+            raise UnknownDatabaseError(f"Unknown database target: {name}")
+        return target
+
+    def resolve_name(self, name=None):
+        """
+        Check that a target exists without connecting to it. The default target is always accepted, so a
+        missing DB_* configuration surfaces where the connection is made, not when a request is routed.
+        """
+        name = name or DEFAULT_DATABASE
+        with self._lock:
+            if name != DEFAULT_DATABASE and name not in self._targets:
+                raise UnknownDatabaseError(f"Unknown database target: {name}")
+        return name
+
+    def targets(self):
+        with self._lock:
+            return [self._targets[name] for name in sorted(self._targets)]
+
+
+def record_pool_stats():
+    """Publish every target's pool occupancy to the metrics registry; called before /metrics renders."""
+    for target in database_registry.targets():
+        stats = target.pool_stats()
+        for state, key in (("open", "size"), ("idle", "idle"), ("in_use", "in_use"), ("max", "max_size")):
+            pool_connections.set(stats[key], database=target.name, state=state)
+
+
+def current_database():
+    return database_registry.get(_current_database.get())
+
+
+def select_database(name=None):
+    """Route the current context (request task) to the named target."""
+    _current_database.set(database_registry.resolve_name(name))
+
+
+@contextmanager
+def using_database(name=None):
+    token = _current_database.set(database_registry.resolve_name(name))
+    try:
+        yield
+    finally:
+        _current_database.reset(token)
+
+
+database_registry = DatabaseRegistry()
@@ -0,0 +1,124 @@
+import os
+import json
+import time
+import threading
+import logging
+from pathlib import Path
+from dotenv import load_dotenv
+from backend.utils.query_cache import normalize_question
+from backend.utils.config import env_flag
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+STORE_DIR = Path(__file__).parent.parent / "config" / "few_shot"
+
+
+def few_shot_settings_from_env():
+    return {
+        "enabled": env_flag("FEW_SHOT_ENABLED", True),
+        "top_k": int(os.getenv("FEW_SHOT_TOP_K", "3")),
+        "max_tokens": int(os.getenv("FEW_SHOT_MAX_TOKENS", "400")),
+        "min_similarity": float(os.getenv("FEW_SHOT_MIN_SIMILARITY", "0.2"))
+    }
+
+
+class ExampleStore:
+    """
+    Question -> SQL pairs that ran without error, persisted as one JSON lines file per database scope.
+
+    Questions are compared after the question cache's normalization (synonyms, stemming, filler words) by
+    token Jaccard similarity. A newer SQL for the same normalized question replaces the older one, and
+    the oldest examples are dropped beyond max_examples per scope.
+    """
+
+    def __init__(self, directory=STORE_DIR, max_examples=500):
+        self.directory = Path(directory)
+        self.max_examples = max_examples
+        self._scopes = {}
+        self._lock = threading.Lock()
+
+    def _path(self, scope):
+        return self.directory / f"{scope}.jsonl"
+
+    def _load(self, scope):
+        entries = self._scopes.get(scope)
+        if entries is not None:
+            return entries
+
+        entries = {}
+        try:
+            with open(self._path(scope)) as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        normalized = normalize_question(entry["question"])
+                        entries.pop(normalized, None)
+                        entries[normalized] = dict(entry, tokens=set(normalized.split()))
+        except (OSError, ValueError):
+            pass
+
+        self._scopes[scope] = entries
+        return entries
+
+    def add(self, scope, question, sql):
+        normalized = normalize_question(question)
+        if not normalized or not sql:
+            return
+
+        with self._lock:
+            entries = self._load(scope)
+            previous = entries.pop(normalized, None)
+            if previous is not None and previous["sql"] == sql:
+                entries[normalized] = previous
+                return
+
+            entry = {"question": question, "sql": sql, "saved_at": time.time()}
+            entries[normalized] = dict(entry, tokens=set(normalized.split()))
+
+            try:
+                self.directory.mkdir(parents=True, exist_ok=True)
+                if previous is None and len(entries) <= self.max_examples:
+                    with open(self._path(scope), "a") as f:
+                        f.write(json.dumps(entry) + "\n")
+                    return
+
+                while len(entries) > self.max_examples:
+                    del entries[next(iter(entries))]
+                self._rewrite(scope, entries)
+            except OSError as e:
+                logger.error("Error saving few-shot example: %s", e)
+
+    def _rewrite(self, scope, entries):
+        path = self._path(scope)
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_path, "w") as f:
+            for entry in entries.values():
+                f.write(json.dumps({key: entry[key] for key in ("question", "sql", "saved_at")}) + "\n")
+        tmp_path.replace(path)
+
+    def search(self, scope, question, top_k=3, min_similarity=0.2):
+        """Return up to top_k {"question", "sql", "similarity"} dicts, most similar first."""
+        tokens = set(normalize_question(question).split())
+        if not tokens:
+            return []
+
+        with self._lock:
+            candidates = list(self._load(scope).values())
+
+        scored = []
+        for entry in candidates:
+            union = tokens | entry["tokens"]
+            similarity = len(tokens & entry["tokens"]) / len(union)
+            if similarity >= min_similarity:
+                scored.append((similarity, entry))
+
+        scored.sort(key=lambda item: (item[0], item[1]["saved_at"]), reverse=True)
+        return [
+            {"question": entry["question"], "sql": entry["sql"], "similarity": similarity}
+            for similarity, entry in scored[:top_k]
+        ]
+
+
+example_store = ExampleStore(max_examples=int(os.getenv("FEW_SHOT_MAX_EXAMPLES", "500")))
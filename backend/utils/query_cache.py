@@ -0,0 +1,130 @@
+import os
+import re
+import time
+import threading
+from collections import OrderedDict
+from dotenv import load_dotenv
+from backend.graph.schema_retrieval import stem
+from backend.utils.config import env_flag
+
+load_dotenv()
+
+PHRASE_SYNONYMS = [
+    (r"\btotal number of\b", "count"),
+    (r"\bhow many\b", "count"),
+    (r"\bnumber of\b", "count"),
+    (r"\bcount of\b", "count"),
+    (r"\bshow me\b", "list"),
+    (r"\bgive me\b", "list"),
+    (r"\bwhat are\b", "list"),
+    (r"\bdisplay\b", "list"),
+    (r"\bshow\b", "list"),
+]
+
+FILLER_WORDS = {"a", "an", "the", "of", "in", "on", "at", "to", "is", "are", "there", "please", "do", "does", "we", "have", "all"}
+
+
+def normalize_question(question):
+    text = question.lower().strip()
+    for pattern, replacement in PHRASE_SYNONYMS:
+        text = re.sub(pattern, replacement, text)
+    words = re.findall(r"[a-z0-9_.']+", text)
+    return " ".join(stem(word) for word in words if word not in FILLER_WORDS)
+
+
+# Words that flip or bound what a question asks for; two questions only match if they agree on all of them
+EXACT_WORDS = {stem(word) for word in (
+    "no", "not", "never", "without", "none", "nobody", "nothing", "neither", "nor", "except", "excluding",
+    "more", "less", "fewer", "greater", "higher", "lower", "above", "below", "over", "under", "than",
+    "most", "least", "top", "bottom", "max", "min", "maximum", "minimum", "before", "after", "only"
+)}
+
+
+def _exact_tokens(tokens):
+    """Numbers, quoted literals, negations and comparisons: tokens a similar match may not drop or change."""
+    return {
+        token for token in tokens
+        if any(ch.isdigit() for ch in token) or "'" in token or token in EXACT_WORDS
+    }
+
+
+class QuestionCache:
+    """
+    LRU/TTL cache mapping normalized questions to the SQL that answered them.
+
+    Entries are scoped per database and schema fingerprint. Lookups try an exact match on the
+    normalized text first, then (only when similarity_threshold > 0) the most similar question in the
+    same scope by token Jaccard similarity, never matching across differing numbers, literals,
+    negations or comparisons.
+    """
+
+    def __init__(self, max_entries=1000, ttl=3600.0, similarity_threshold=0.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.similarity_threshold = similarity_threshold
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, scope, question):
+        normalized = normalize_question(question)
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._entries.get((scope, normalized))
+            if entry and now - entry["stored_at"] <= self.ttl:
+                self._entries.move_to_end((scope, normalized))
+                return entry["sql"], "exact"
+
+            if not self.similarity_threshold:
+                return None, None
+
+            tokens = set(normalized.split())
+            exact = _exact_tokens(tokens)
+            best_key, best_score = None, 0.0
+            for key, candidate in self._entries.items():
+                if key[0] != scope or now - candidate["stored_at"] > self.ttl:
+                    continue
+                if _exact_tokens(candidate["tokens"]) != exact:
+                    continue
+                union = tokens | candidate["tokens"]
+                score = len(tokens & candidate["tokens"]) / len(union) if union else 0.0
+                if score > best_score:
+                    best_key, best_score = key, score
+
+            if best_key is not None and best_score >= self.similarity_threshold:
+                self._entries.move_to_end(best_key)
+                return self._entries[best_key]["sql"], "similar"
+
+        return None, None
+
+    def put(self, scope, question, sql):
+        normalized = normalize_question(question)
+        with self._lock:
+            self._entries[(scope, normalized)] = {
+                "sql": sql,
+                "tokens": set(normalized.split()),
+                "stored_at": time.monotonic()
+            }
+            self._entries.move_to_end((scope, normalized))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate_sql(self, scope, sql):
+        with self._lock:
+            for key in [key for key, entry in self._entries.items() if key[0] == scope and entry["sql"] == sql]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+def query_cache_enabled():
+    return env_flag("QUERY_CACHE_ENABLED", True)
+
+
+question_cache = QuestionCache(
+    max_entries=int(os.getenv("QUERY_CACHE_MAX_ENTRIES", "1000")),
+    ttl=float(os.getenv("QUERY_CACHE_TTL", "3600")),
+    similarity_threshold=float(os.getenv("QUERY_CACHE_SIMILARITY", "0"))
+)
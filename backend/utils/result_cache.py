@@ -0,0 +1,115 @@
+import os
+import re
+import time
+import threading
+from collections import OrderedDict
+from dotenv import load_dotenv
+from backend.utils.config import env_flag
+
+load_dotenv()
+
+READ_ONLY_STATEMENTS = {"select", "with", "table", "values", "show"}
+CURSOR_STATEMENTS = {"select", "with", "table", "values"}
+WRITE_KEYWORDS = re.compile(r"\b(insert|update|delete|merge|truncate|create|alter|drop|grant|revoke|copy|into)\b")
+VOLATILE_FUNCTIONS = re.compile(
+    r"\b(random|nextval|setval|currval|clock_timestamp|timeofday|gen_random_uuid|uuid_generate_v4|pg_sleep|txid_current)\s*\("
+)
+
+
+def normalize_sql(sql):
+    parts = []
+    for literal, code in re.findall(r"""('(?:[^']|'')*'|"(?:[^"]|"")*")|([^'"]+)""", sql):
+        parts.append(literal if literal else re.sub(r"\s+", " ", code.lower()))
+    return "".join(parts).strip().rstrip(";").strip()
+
+
+def _code_only(normalized_sql):
+    return re.sub(r"""'(?:[^']|'')*'|"(?:[^"]|"")*\"""", "''", normalized_sql)
+
+
+def is_read_only(normalized_sql):
+    code = _code_only(normalized_sql)
+    first = code.split(" ", 1)[0].lstrip("(")
+    return first in READ_ONLY_STATEMENTS and ";" not in code and not WRITE_KEYWORDS.search(code)
+
+
+def supports_server_cursor(normalized_sql):
+    first = _code_only(normalized_sql).split(" ", 1)[0].lstrip("(")
+    return first in CURSOR_STATEMENTS and is_read_only(normalized_sql)
+
+
+def is_cacheable(normalized_sql):
+    return is_read_only(normalized_sql) and not VOLATILE_FUNCTIONS.search(_code_only(normalized_sql))
+
+
+class ResultCache:
+    """
+    Byte-bounded LRU cache of query results keyed by database identity and normalized SQL.
+
+    Entries expire after ttl seconds; results larger than max_entry_bytes are never cached and the
+    least recently used entries are evicted once the total exceeds max_bytes.
+    """
+
+    def __init__(self, max_bytes=64 * 1024 * 1024, max_entry_bytes=1024 * 1024, ttl=60.0):
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, scope, normalized_sql):
+        key = (scope, normalized_sql)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if time.monotonic() - entry["stored_at"] > self.ttl:
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry["result"]
+
+    def put(self, scope, normalized_sql, result, size):
+        if size > self.max_entry_bytes or not self.ttl:
+            return
+
+        key = (scope, normalized_sql)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = {"result": result, "size": size, "stored_at": time.monotonic()}
+            self._bytes += size
+            while self._bytes > self.max_bytes and self._entries:
+                self._remove(next(iter(self._entries)))
+
+    def invalidate_scope(self, scope):
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == scope]:
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self._bytes, "max_bytes": self.max_bytes}
+
+    def _remove(self, key):
+        entry = self._entries.pop(key)
+        self._bytes -= entry["size"]
+
+
+def result_cache_enabled():
+    return env_flag("RESULT_CACHE_ENABLED", True)
+
+
+def result_cache_settings_from_env():
+    """Settings for each database target's ResultCache (see backend.utils.db_registry)."""
+    return {
+        "max_bytes": int(os.getenv("RESULT_CACHE_MAX_BYTES", str(64 * 1024 * 1024))),
+        "max_entry_bytes": int(os.getenv("RESULT_CACHE_MAX_ENTRY_BYTES", str(1024 * 1024))),
+        "ttl": float(os.getenv("RESULT_CACHE_TTL", "60"))
+    }
@@ -0,0 +1,127 @@
+import datetime
+from decimal import Decimal
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+# Builtin PostgreSQL type OIDs, enough to label the columns of typical query results
+PG_TYPE_NAMES = {
+    16: "bool", 17: "bytea", 18: "char", 19: "name", 20: "int8", 21: "int2", 23: "int4", 25: "text",
+    26: "oid", 114: "json", 700: "float4", 701: "float8", 790: "money", 1042: "bpchar", 1043: "varchar",
+    1082: "date", 1083: "time", 1114: "timestamp", 1184: "timestamptz", 1186: "interval", 1266: "timetz",
+    1700: "numeric", 2950: "uuid", 3802: "jsonb"
+}
+
+ARROW_TYPES = {
+    "bool": "bool_", "int2": "int16", "int4": "int32", "int8": "int64", "oid": "int64",
+    "float4": "float32", "float8": "float64", "date": "date32"
+}
+
+
+def format_cell(value):
+    if value is None:
+        return "NULL"
+    if isinstance(value, float):
+        return f"{value:.6g}"
+    if isinstance(value, (datetime.date, datetime.datetime, datetime.time)):
+        return value.isoformat()
+    return str(value).replace("\\", "\\\\").replace("|", "\\|").replace("\n", "\\n")
+
+
+def truncation_marker(shown, total, truncated):
+    if not truncated and shown >= total:
+        return ""
+    total_text = f"more than {total}" if truncated else str(total)
+    return f"\n[TRUNCATED: showing the first {shown} of {total_text} rows. Use aggregates or LIMIT for exact figures.]"
+
+
+def _is_number(value):
+    return isinstance(value, (int, float, Decimal)) and not isinstance(value, bool)
+
+
+class ResultSet:
+    """
+    Column-oriented query result: column names, PostgreSQL type names and one value list per column.
+    """
+
+    def __init__(self, columns, types, data, truncated=False):
+        self.columns = columns
+        self.types = types
+        self.data = data
+        self.truncated = truncated
+
+    @classmethod
+    def from_rows(cls, description, rows, truncated=False):
+        columns = [column.name for column in description]
+        types = [PG_TYPE_NAMES.get(column.type_code, "unknown") for column in description]
+        data = [list(values) for values in zip(*rows)] if rows else [[] for _ in columns]
+        return cls(columns, types, data, truncated)
+
+    @property
+    def row_count(self):
+        return len(self.data[0]) if self.data else 0
+
+    def rows(self, offset=0, limit=None):
+        end = None if limit is None else offset + limit
+        return list(zip(*(values[offset:end] for values in self.data)))
+
+    def slice(self, offset=0, limit=None):
+        end = None if limit is None else offset + limit
+        return ResultSet(self.columns, self.types, [values[offset:end] for values in self.data], self.truncated)
+
+    def to_dict(self):
+        return {"columns": self.columns, "types": self.types, "data": self.data}
+
+    def to_arrow(self):
+        """Serialize as an Arrow IPC stream. Requires the optional pyarrow package."""
+        if pyarrow is None:
+            raise RuntimeError("pyarrow is not installed")
+
+        arrays = []
+        for type_name, values in zip(self.types, self.data):
+            if type_name in ARROW_TYPES:
+                arrow_type = getattr(pyarrow, ARROW_TYPES[type_name])()
+            else:
+                arrow_type = pyarrow.string()
+                values = [value if value is None or isinstance(value, str) else format_cell(value) for value in values]
+            arrays.append(pyarrow.array(values, type=arrow_type))
+
+        table = pyarrow.Table.from_arrays(arrays, names=self.columns)
+        sink = pyarrow.BufferOutputStream()
+        with pyarrow.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue().to_pybytes()
+
+    def summary(self):
+        stats = []
+        for name, values in zip(self.columns, self.data):
+            numbers = [value for value in values if _is_number(value)]
+            nulls = sum(value is None for value in values)
+            parts = []
+            if numbers:
+                average = sum(float(number) for number in numbers) / len(numbers)
+                parts.append(f"min={format_cell(min(numbers))} max={format_cell(max(numbers))} avg={average:.6g}")
+            elif len(values) > nulls:
+                parts.append(f"distinct={len({str(value) for value in values if value is not None})}")
+            if nulls:
+                parts.append(f"nulls={nulls}")
+            if parts:
+                stats.append(f"{name} " + " ".join(parts))
+        return stats
+
+    def render_for_llm(self, max_rows):
+        """
+        Compact text rendering: a header of column names and types, the first max_rows rows as pipe-separated values and,
+        when rows were left out, per-column summary statistics over every fetched row.
+        """
+        shown = min(self.row_count, max_rows)
+        lines = ["|".join(f"{name} ({type_name})" for name, type_name in zip(self.columns, self.types))]
+        lines.extend("|".join(format_cell(value) for value in row) for row in self.rows(0, shown))
+        if not self.row_count:
+            lines.append("(no rows)")
+
+        if shown < self.row_count or self.truncated:
+            lines.append("stats: " + "; ".join(self.summary()))
+        return "\n".join(lines) + truncation_marker(shown, self.row_count, self.truncated)
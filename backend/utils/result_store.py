@@ -0,0 +1,96 @@
+import os
+import time
+import uuid
+import threading
+from collections import OrderedDict
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+def result_limits_from_env():
+    return {
+        "max_rows": int(os.getenv("SQL_MAX_ROWS", "10000")),
+        "max_bytes": int(os.getenv("SQL_MAX_RESULT_BYTES", str(16 * 1024 * 1024))),
+        "batch_size": int(os.getenv("SQL_FETCH_BATCH_SIZE", "1000")),
+        "prompt_rows": int(os.getenv("SQL_PROMPT_MAX_ROWS", "100"))
+    }
+
+
+def fetch_limited(cursor, max_rows, max_bytes, batch_size):
+    """
+    Fetch rows in batches until the cursor is exhausted or max_rows / max_bytes is reached.
+
+    Returns (rows, size, truncated) where size is the approximate text size of the rows and
+    truncated is True when the cursor still had rows left.
+    """
+    rows = []
+    size = 0
+    while True:
+        batch = cursor.fetchmany(max(1, min(batch_size, max_rows - len(rows) + 1)))
+        if not batch:
+            return rows, size, False
+        for row in batch:
+            if len(rows) >= max_rows or size >= max_bytes:
+                return rows, size, True
+            rows.append(row)
+            size += len(str(row))
+
+
+class ResultStore:
+    """
+    Byte-bounded LRU store of fetched ResultSets, addressed by a generated result_id.
+
+    Lets clients page through a result after the request that produced it without re-running the
+    query. Entries expire after ttl seconds and the least recently used are evicted past max_bytes.
+    """
+
+    def __init__(self, max_bytes=128 * 1024 * 1024, ttl=900.0):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def put(self, result_set, size):
+        if size > self.max_bytes or not self.ttl:
+            return None
+
+        result_id = uuid.uuid4().hex
+        with self._lock:
+            self._entries[result_id] = {
+                "result_set": result_set,
+                "size": size,
+                "stored_at": time.monotonic()
+            }
+            self._bytes += size
+            while self._bytes > self.max_bytes and self._entries:
+                self._remove(next(iter(self._entries)))
+        return result_id
+
+    def page(self, result_id, offset=0, limit=100):
+        with self._lock:
+            entry = self._entries.get(result_id)
+            if entry is None:
+                return None
+            if time.monotonic() - entry["stored_at"] > self.ttl:
+                self._remove(result_id)
+                return None
+            self._entries.move_to_end(result_id)
+
+        return entry["result_set"].slice(offset, limit), entry["result_set"].row_count
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _remove(self, result_id):
+        entry = self._entries.pop(result_id)
+        self._bytes -= entry["size"]
+
+
+result_store = ResultStore(
+    max_bytes=int(os.getenv("RESULT_STORE_MAX_BYTES", str(128 * 1024 * 1024))),
+    ttl=float(os.getenv("RESULT_STORE_TTL", "900"))
+)
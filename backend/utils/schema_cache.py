@@ -0,0 +1,81 @@
+import os
+import json
+import time
+import hashlib
+import logging
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = Path(__file__).parent.parent / "config" / "schema_cache"
+CACHE_VERSION = 1
+
+FINGERPRINT_QUERY = """
+    SELECT md5(
+        coalesce((
+            SELECT string_agg(c.oid::text || ':' || c.xmin::text, ',' ORDER BY c.oid)
+            FROM pg_catalog.pg_class c
+            JOIN pg_catalog.pg_namespace n ON n.oid = c.relnamespace
+            WHERE n.nspname = %(schema)s AND c.relkind IN ('r', 'p')
+        ), '') || '|' ||
+        coalesce((
+            SELECT string_agg(a.attrelid::text || '.' || a.attnum::text || ':' || a.xmin::text, ','
+                              ORDER BY a.attrelid, a.attnum)
+            FROM pg_catalog.pg_attribute a
+            JOIN pg_catalog.pg_class c ON c.oid = a.attrelid
+            JOIN pg_catalog.pg_namespace n ON n.oid = c.relnamespace
+            WHERE n.nspname = %(schema)s AND c.relkind IN ('r', 'p') AND a.attnum > 0
+        ), '') || '|' ||
+        coalesce((
+            SELECT string_agg(con.oid::text || ':' || con.xmin::text, ',' ORDER BY con.oid)
+            FROM pg_catalog.pg_constraint con
+            JOIN pg_catalog.pg_namespace n ON n.oid = con.connamespace
+            WHERE n.nspname = %(schema)s
+        ), '')
+    )
+"""
+
+
+def schema_cache_key(connection_params, schema_name):
+    identity = "|".join(str(connection_params.get(field)) for field in ("host", "port", "dbname", "user"))
+    digest = hashlib.sha256(f"{identity}|{schema_name}".encode()).hexdigest()[:16]
+    return f"{connection_params.get('dbname')}-{schema_name}-{digest}"
+
+
+def fetch_schema_fingerprint(cursor, schema_name):
+    cursor.execute(FINGERPRINT_QUERY, {"schema": schema_name})
+    return cursor.fetchone()[0]
+
+
+def load_cached_schema(cache_key):
+    path = CACHE_DIR / f"{cache_key}.json"
+    try:
+        with open(path, "r") as f:
+            entry = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if entry.get("version") != CACHE_VERSION or entry.get("key") != cache_key:
+        return None
+
+    return entry
+
+
+def save_cached_schema(cache_key, fingerprint, schema):
+    path = CACHE_DIR / f"{cache_key}.json"
+    entry = {
+        "version": CACHE_VERSION,
+        "key": cache_key,
+        "fingerprint": fingerprint,
+        "saved_at": time.time(),
+        "schema": schema
+    }
+
+    try:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(entry, f)
+        tmp_path.replace(path)
+    except OSError as e:
+        logger.error("Error saving schema cache: %s", e)
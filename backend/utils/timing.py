@@ -0,0 +1,39 @@
+import time
+import contextvars
+from contextlib import contextmanager
+from backend.utils.metrics import registry
+from backend.utils.tracing import start_span
+
+_stage_timings = contextvars.ContextVar("stage_timings", default=None)
+
+stage_seconds = registry.histogram(
+    "sql_agent_stage_seconds",
+    "Pipeline stage latency by stage (check_input, agent, llm, tools, schema_discovery, schema, sql, answer)"
+)
+
+
+def collect_stage_timings():
+    """
+    Start recording pipeline stage durations for the current context and return the list they go to.
+
+    Work dispatched through run_in_db_executor copies the context, so stages timed on DB threads land in
+    the same list.
+    """
+    timings = []
+    _stage_timings.set(timings)
+    return timings
+
+
+@contextmanager
+def stage(name):
+    """Time a pipeline stage into sql_agent_stage_seconds, an OpenTelemetry span when tracing is on, and any collector."""
+    with start_span(f"sql_agent.{name}"):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            stage_seconds.observe(elapsed, stage=name)
+            timings = _stage_timings.get()
+            if timings is not None:
+                timings.append((name, elapsed))
@@ -0,0 +1,63 @@
+import os
+import logging
+from contextlib import nullcontext
+
+logger = logging.getLogger(__name__)
+
+_trace = None
+_tracer = None
+
+
+def tracing_exporter():
+    return os.getenv("OTEL_TRACING", "none").lower()
+
+
+def configure_tracing():
+    """
+    Send stage() spans to OpenTelemetry when OTEL_TRACING is otlp (OTLP over HTTP, configured by the standard
+    OTEL_EXPORTER_OTLP_* variables) or console. The opentelemetry packages are only needed when it is enabled.
+    """
+    global _trace, _tracer
+
+    exporter_name = tracing_exporter()
+    if exporter_name in ("", "none", "false", "0"):
+        return None
+
+    try:
+        from opentelemetry import trace
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+
+        if exporter_name == "otlp":
+            from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+            exporter = OTLPSpanExporter()
+        elif exporter_name == "console":
+            exporter = ConsoleSpanExporter()
+        else:
+            logger.warning("Unknown OTEL_TRACING %r; expected otlp, console or none", exporter_name)
+            return None
+    except ImportError as e:
+        logger.warning("OpenTelemetry tracing disabled, packages missing: %s", e)
+        return None
+
+    provider = TracerProvider(resource=Resource.create({"service.name": os.getenv("OTEL_SERVICE_NAME", "sql-agent")}))
+    provider.add_span_processor(BatchSpanProcessor(exporter))
+    trace.set_tracer_provider(provider)
+    _trace = trace
+    _tracer = trace.get_tracer("sql_agent")
+    return _tracer
+
+
+def start_span(name):
+    return _tracer.start_as_current_span(name) if _tracer is not None else nullcontext()
+
+
+def set_span_attributes(**attributes):
+    if _tracer is None:
+        return
+
+    span = _trace.get_current_span()
+    for key, value in attributes.items():
+        if value is not None:
+            span.set_attribute(f"sql_agent.{key}", value)
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Template answer hit rate and latency saved vs. the answer LLM.
+
+Executes each (question, SQL) pair against the database configured in .env, renders the answer
+with the local templates, and (with --llm) times the Groq answer call for the same result. The
+default corpus only queries pg_catalog views so it runs against any PostgreSQL database; pass a
+JSON file of [{"question": ..., "sql": ...}] to use your own.
+
+Usage: python benchmarks/answer_templates.py [--corpus questions.json] [--llm]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+from backend.graph.answer import generate_answer
+from backend.graph.answer_templates import render_answer
+from backend.graph.tools import run_sql
+
+load_dotenv()
+
+DEFAULT_CORPUS = [
+    {"question": "How many tables are there?", "sql": "SELECT count(*) FROM pg_catalog.pg_tables"},
+    {"question": "How many schemas exist?", "sql": "SELECT count(*) FROM pg_catalog.pg_namespace"},
+    {"question": "What is the current database?", "sql": "SELECT current_database()"},
+    {"question": "List the schema names", "sql": "SELECT nspname AS schema_name FROM pg_catalog.pg_namespace ORDER BY 1 LIMIT 10"},
+    {"question": "How many tables per schema?", "sql": "SELECT schemaname, count(*) FROM pg_catalog.pg_tables GROUP BY 1 ORDER BY 1"},
+    {"question": "Which tables are called nothing?", "sql": "SELECT tablename FROM pg_catalog.pg_tables WHERE tablename = ''"},
+    {"question": "Show the database settings", "sql": "SELECT name, setting, unit, category FROM pg_catalog.pg_settings ORDER BY 1 LIMIT 5"},
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", help="JSON file with a list of {question, sql} objects")
+    parser.add_argument("--llm", action="store_true", help="Also time the LLM answer for each result")
+    args = parser.parse_args()
+
+    corpus = DEFAULT_CORPUS
+    if args.corpus:
+        with open(args.corpus) as f:
+            corpus = json.load(f)
+
+    hits = 0
+    template_times = []
+    llm_times = []
+    for item in corpus:
+        execution = run_sql(item["sql"])
+
+        started = time.perf_counter()
+        data = execution["data"]
+        answer = render_answer(item["question"], data.columns, data.rows()) if data is not None else None
+        template_times.append(time.perf_counter() - started)
+        hits += answer is not None
+
+        if args.llm:
+            started = time.perf_counter()
+            generate_answer(item["question"], execution["sql"], execution["result"])
+            llm_times.append(time.perf_counter() - started)
+
+        print(f"{'template' if answer else 'llm':<9} {item['question']}\n          -> {answer}")
+
+    print(f"\nTemplate hit rate: {hits}/{len(corpus)} ({hits / len(corpus) * 100:.0f}%)")
+    print(f"Median template render: {statistics.median(template_times) * 1e6:.1f}us")
+    if llm_times:
+        llm_median = statistics.median(llm_times)
+        print(f"Median LLM answer: {llm_median * 1000:.0f}ms; "
+              f"estimated saving {hits * llm_median:.2f}s over {len(corpus)} questions")
+
+
+if __name__ == "__main__":
+    main()
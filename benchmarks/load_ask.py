@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Load benchmark for /query/ask with the offline stub LLM provider (LLM_PROVIDER=stub).
+
+Compares the async route (graph ainvoke, async LLM calls, DB work on the dedicated DB executor)
+against the previous sync route, which FastAPI runs on its worker threadpool. Requests go through
+the ASGI app in-process; SQL runs against the database configured in .env. The question cache is
+disabled so every request runs the full agent.
+
+Usage: python benchmarks/load_ask.py --requests 400 --concurrency 100 --latency 0.2
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("QUERY_CACHE_ENABLED", "false")
+os.environ["LLM_PROVIDER"] = "stub"
+
+import httpx
+from fastapi import FastAPI
+from main import app
+from backend.graph.agent import get_agent
+from backend.graph.tools import discover_database_schema
+from backend.interactors.nlp import process_user_query
+from backend.schemas.query import QueryRequest, QueryResponse
+
+sync_app = FastAPI()
+
+
+@sync_app.post("/query/ask", response_model=QueryResponse)
+def sync_ask_db(query: QueryRequest):
+    sql_query, answer, queries = process_user_query(query.question, bypass_cache=query.bypass_cache)
+    return QueryResponse(sql_query=sql_query, answer=answer, queries=queries)
+
+
+async def run_load(target_app, total, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    failures = 0
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=target_app), base_url="http://bench", timeout=None) as client:
+        async def one(i):
+            nonlocal failures
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.post("/query/ask", json={"question": f"How many rows? #{i}"})
+                latencies.append(time.perf_counter() - started)
+                if response.status_code != 200:
+                    failures += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(total)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "rps": total / elapsed,
+        "p50": latencies[len(latencies) // 2],
+        "p95": latencies[int(len(latencies) * 0.95) - 1],
+        "failures": failures,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--latency", type=float, default=0.2, help="Stub LLM latency per call in seconds")
+    parser.add_argument("--sql", default="SELECT 1")
+    args = parser.parse_args()
+
+    os.environ["LLM_STUB_LATENCY"] = str(args.latency)
+    os.environ["LLM_STUB_SQL"] = args.sql
+    get_agent()
+    discover_database_schema()
+
+    print(f"{'route':<6} {'req/s':>8} {'p50 (s)':>8} {'p95 (s)':>8} {'failed':>7}")
+    for name, target_app in (("sync", sync_app), ("async", app)):
+        result = asyncio.run(run_load(target_app, args.requests, args.concurrency))
+        print(f"{name:<6} {result['rps']:>8.1f} {result['p50']:>8.3f} {result['p95']:>8.3f} {result['failures']:>7}")
+
+
+if __name__ == "__main__":
+    main()
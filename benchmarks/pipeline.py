@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+"""
+End-to-end benchmark of the NL-to-SQL pipeline with the offline stub LLM (LLM_PROVIDER=stub).
+
+Seeds a scratch schema with customers, products, orders and order_items in the PostgreSQL database
+configured in .env, records the SQL for a fixed question corpus, and replays it through:
+
+  direct  process_user_query, one question at a time, with per-stage latency (graph nodes, model calls,
+          schema, SQL execution, answer)
+  api     POST /query/ask on the FastAPI app in-process, at each --concurrency level, for throughput
+
+Latencies are reported as p50/p95/p99 together with peak RSS (and the tracemalloc peak with
+--tracemalloc). --output writes the results as JSON; --compare checks them against an earlier JSON file
+and exits non-zero when a p95 latency regresses by more than --max-regression.
+
+Usage: python benchmarks/pipeline.py --rounds 5 --concurrency 1 10 50 --output pipeline.json
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import platform
+import resource
+import statistics
+import subprocess
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+BENCH_SCHEMA = "bench_pipeline"
+
+os.environ["LLM_PROVIDER"] = "stub"
+os.environ["DB_SCHEMA"] = BENCH_SCHEMA
+os.environ.setdefault("QUERY_CACHE_ENABLED", "false")
+os.environ.setdefault("RESULT_CACHE_ENABLED", "false")
+
+import httpx
+from dotenv import load_dotenv
+from main import app
+from backend.graph.agent import get_agent
+from backend.graph.tools import get_database_connection, discover_database_schema
+from backend.interactors.nlp import process_user_query
+from backend.utils.timing import collect_stage_timings
+
+load_dotenv()
+
+CORPUS = [
+    {"question": "Hello, how are you?", "sql": "SELECT 1"},
+    {"question": "How many customers are there?", "sql": "SELECT count(*) FROM customers"},
+    {"question": "Which city has the most customers?",
+     "sql": "SELECT city, count(*) AS customers FROM customers GROUP BY city ORDER BY customers DESC LIMIT 1"},
+    {"question": "What are the product categories?", "sql": "SELECT DISTINCT category FROM products ORDER BY category"},
+    {"question": "What is the total order amount per customer?",
+     "sql": "SELECT c.first_name, c.last_name, SUM(o.total_amount) AS total FROM customers c "
+            "JOIN orders o ON o.customer_id = c.customer_id GROUP BY c.customer_id, c.first_name, c.last_name "
+            "ORDER BY total DESC"},
+    {"question": "Which customers have placed more than 5 orders?",
+     "sql": "SELECT c.first_name, c.last_name, COUNT(o.order_id) AS orders FROM customers c "
+            "JOIN orders o ON o.customer_id = c.customer_id GROUP BY c.customer_id, c.first_name, c.last_name "
+            "HAVING COUNT(o.order_id) > 5"},
+    {"question": "What are the top 5 products by revenue?",
+     "sql": "SELECT p.name, SUM(oi.quantity * p.price) AS revenue FROM order_items oi "
+            "JOIN products p ON p.product_id = oi.product_id GROUP BY p.name ORDER BY revenue DESC LIMIT 5"},
+    {"question": "What is the average order value per month?",
+     "sql": "SELECT date_trunc('month', order_date) AS month, AVG(total_amount) AS average FROM orders "
+            "GROUP BY 1 ORDER BY 1"},
+    {"question": "Show all orders", "sql": "SELECT * FROM orders"},
+]
+
+
+def seed_schema(rows):
+    conn = get_database_connection()
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(f"DROP SCHEMA IF EXISTS {BENCH_SCHEMA} CASCADE")
+            cursor.execute(f"CREATE SCHEMA {BENCH_SCHEMA}")
+            cursor.execute(f"SET search_path TO {BENCH_SCHEMA}")
+            cursor.execute("""
+                CREATE TABLE customers (
+                    customer_id serial PRIMARY KEY, first_name text NOT NULL, last_name text NOT NULL,
+                    email varchar(255), city text
+                );
+                CREATE TABLE products (
+                    product_id serial PRIMARY KEY, name text NOT NULL, category text, price numeric(10, 2)
+                );
+                CREATE TABLE orders (
+                    order_id serial PRIMARY KEY, customer_id integer REFERENCES customers(customer_id),
+                    order_date date, total_amount numeric(12, 2)
+                );
+                CREATE TABLE order_items (
+                    order_id integer REFERENCES orders(order_id), product_id integer REFERENCES products(product_id),
+                    quantity integer
+                );
+            """)
+            cursor.execute(f"""
+                INSERT INTO customers (first_name, last_name, email, city)
+                SELECT 'First' || i, 'Last' || i, 'user' || i || '@example.com',
+                       (ARRAY['Karachi', 'Lahore', 'Islamabad', 'Quetta', 'Peshawar'])[1 + i % 5]
+                FROM generate_series(1, {int(rows)}) AS i;
+                INSERT INTO products (name, category, price)
+                SELECT 'Product ' || i, (ARRAY['Books', 'Games', 'Tools', 'Garden'])[1 + i % 4], 5 + (i * 37) % 200
+                FROM generate_series(1, 50) AS i;
+                INSERT INTO orders (customer_id, order_date, total_amount)
+                SELECT 1 + (i * 7) % {int(rows)}, date '2024-01-01' + (i % 365), 10 + (i * 13) % 490
+                FROM generate_series(1, {int(rows)} * 5) AS i;
+                INSERT INTO order_items (order_id, product_id, quantity)
+                SELECT 1 + i / 3, 1 + (i * 11) % 50, 1 + i % 4
+                FROM generate_series(0, {int(rows)} * 15 - 1) AS i;
+                ANALYZE;
+            """)
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def drop_schema():
+    conn = get_database_connection()
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(f"DROP SCHEMA IF EXISTS {BENCH_SCHEMA} CASCADE")
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def percentiles(values):
+    if not values:
+        return {}
+    ordered = sorted(values)
+
+    def pick(fraction):
+        return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+    return {
+        "count": len(ordered),
+        "mean_ms": statistics.fmean(ordered) * 1000,
+        "p50_ms": pick(0.50) * 1000,
+        "p95_ms": pick(0.95) * 1000,
+        "p99_ms": pick(0.99) * 1000
+    }
+
+
+def peak_rss_mb():
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    scale = 1024 * 1024 if platform.system() == "Darwin" else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+
+
+def run_direct(rounds):
+    latencies = []
+    stages = {}
+    failures = 0
+
+    for _ in range(rounds):
+        for item in CORPUS:
+            timings = collect_stage_timings()
+            started = time.perf_counter()
+            try:
+                process_user_query(item["question"])
+            except Exception as e:
+                failures += 1
+                print(f"direct: {item['question']!r} failed: {e}", file=sys.stderr)
+            latencies.append(time.perf_counter() - started)
+
+            totals = {}
+            for name, seconds in timings:
+                totals[name] = totals.get(name, 0.0) + seconds
+            for name, seconds in totals.items():
+                stages.setdefault(name, []).append(seconds)
+
+    return {
+        "latency": percentiles(latencies),
+        "stages": {name: percentiles(values) for name, values in sorted(stages.items())},
+        "failures": failures
+    }
+
+
+async def run_api(total, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    failures = 0
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=None) as client:
+        async def one(i):
+            nonlocal failures
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.post("/query/ask", json={"question": CORPUS[i % len(CORPUS)]["question"]})
+                latencies.append(time.perf_counter() - started)
+                if response.status_code != 200:
+                    failures += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(total)))
+        elapsed = time.perf_counter() - started
+
+    return {
+        "concurrency": concurrency,
+        "requests": total,
+        "throughput_rps": total / elapsed,
+        "latency": percentiles(latencies),
+        "failures": failures
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline_path, max_regression):
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+
+    pairs = [("direct", results["direct"]["latency"], baseline["direct"]["latency"])]
+    pairs += [
+        (f"direct:{name}", stats, baseline["direct"]["stages"].get(name))
+        for name, stats in results["direct"]["stages"].items()
+    ]
+    baseline_api = {run["concurrency"]: run for run in baseline.get("api", [])}
+    pairs += [
+        (f"api@{run['concurrency']}", run["latency"], baseline_api.get(run["concurrency"], {}).get("latency"))
+        for run in results["api"]
+    ]
+
+    regressions = []
+    print(f"\n{'p95 vs ' + os.path.basename(baseline_path):<32} {'before':>10} {'after':>10} {'change':>8}")
+    for name, current, previous in pairs:
+        if not previous or not current or not previous.get("p95_ms"):
+            continue
+        change = current["p95_ms"] / previous["p95_ms"] - 1
+        print(f"{name:<32} {previous['p95_ms']:>10.1f} {current['p95_ms']:>10.1f} {change:>+8.0%}")
+        # sub-millisecond stages are dominated by noise, so a regression also needs an absolute increase
+        if change > max_regression and current["p95_ms"] - previous["p95_ms"] > 1.0:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1000, help="Customers to seed (orders x5, order items x15)")
+    parser.add_argument("--rounds", type=int, default=5, help="Passes over the corpus in direct mode")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument("--requests", type=int, default=200, help="Requests per concurrency level in api mode")
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="Stub LLM latency per call in seconds")
+    parser.add_argument("--tracemalloc", action="store_true", help="Also report the Python heap peak (slower)")
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    parser.add_argument("--compare", help="Earlier JSON results to compare p95 latencies against")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="Allowed p95 increase for --compare")
+    parser.add_argument("--keep", action="store_true", help=f"Keep the {BENCH_SCHEMA} schema afterwards")
+    args = parser.parse_args()
+
+    recording = tempfile.NamedTemporaryFile("w", suffix=".jsonl", delete=False)
+    with recording:
+        for item in CORPUS:
+            recording.write(json.dumps(item) + "\n")
+    os.environ["LLM_STUB_RECORDING"] = recording.name
+    os.environ["LLM_STUB_LATENCY"] = str(args.llm_latency)
+
+    seed_schema(args.rows)
+    try:
+        get_agent()
+        discover_database_schema()
+        if args.tracemalloc:
+            tracemalloc.start()
+        rss_before = peak_rss_mb()
+
+        results = {
+            "revision": git_revision(),
+            "config": {
+                "rows": args.rows, "rounds": args.rounds, "requests": args.requests,
+                "llm_latency": args.llm_latency, "corpus": len(CORPUS),
+                "query_cache": os.environ["QUERY_CACHE_ENABLED"], "result_cache": os.environ["RESULT_CACHE_ENABLED"]
+            },
+            "direct": run_direct(args.rounds),
+            "api": [asyncio.run(run_api(args.requests, concurrency)) for concurrency in args.concurrency]
+        }
+        results["memory"] = {"peak_rss_mb_before": rss_before, "peak_rss_mb": peak_rss_mb()}
+        if args.tracemalloc:
+            results["memory"]["tracemalloc_peak_mb"] = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+    finally:
+        os.unlink(recording.name)
+        if not args.keep:
+            drop_schema()
+
+    direct = results["direct"]
+    print(f"{'stage':<16} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for name, stats in [("end_to_end", direct["latency"])] + list(direct["stages"].items()):
+        print(f"{name:<16} {stats['p50_ms']:>9.2f} {stats['p95_ms']:>9.2f} {stats['p99_ms']:>9.2f}")
+    print(f"\n{'concurrency':<12} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'failed':>7}")
+    for run in results["api"]:
+        stats = run["latency"]
+        print(f"{run['concurrency']:<12} {run['throughput_rps']:>8.1f} {stats['p50_ms']:>9.1f} "
+              f"{stats['p95_ms']:>9.1f} {stats['p99_ms']:>9.1f} {run['failures']:>7}")
+    print(f"\npeak RSS {results['memory']['peak_rss_mb']:.1f} MB")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.compare:
+        regressions = compare(results, args.compare, args.max_regression)
+        if regressions:
+            print(f"\np95 regressed by more than {args.max_regression:.0%}: {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
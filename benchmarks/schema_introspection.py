@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Cold schema-load benchmark: legacy per-table information_schema loop vs bulk pg_catalog introspection.
+
+Creates a scratch schema with N tables (each with a primary key and a foreign key to the previous
+table) in the database configured by DB_* environment variables, then times both strategies.
+
+Usage: python benchmarks/schema_introspection.py --tables 10 100 600 --repeat 3
+"""
+import os
+import sys
+import time
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+from backend.graph.tools import get_database_connection, introspect_schema
+
+load_dotenv()
+
+BENCH_SCHEMA = "bench_introspection"
+
+
+def legacy_introspect(cursor, schema_name):
+    cursor.execute("""
+        SELECT table_name
+        FROM information_schema.tables
+        WHERE table_schema = %s AND table_type = 'BASE TABLE'
+    """, (schema_name,))
+    tables = [row[0] for row in cursor.fetchall()]
+
+    schema_info = {"tables": {}, "relationships": []}
+    for table in tables:
+        cursor.execute("""
+            SELECT column_name, data_type, is_nullable, column_default
+            FROM information_schema.columns
+            WHERE table_schema = %s AND table_name = %s
+            ORDER BY ordinal_position
+        """, (schema_name, table))
+        schema_info["tables"][table] = {"columns": cursor.fetchall()}
+
+    cursor.execute("""
+        SELECT tc.table_name, kcu.column_name, ccu.table_name, ccu.column_name
+        FROM information_schema.table_constraints AS tc
+        JOIN information_schema.key_column_usage AS kcu
+            ON tc.constraint_name = kcu.constraint_name AND tc.table_schema = kcu.table_schema
+        JOIN information_schema.constraint_column_usage AS ccu
+            ON ccu.constraint_name = tc.constraint_name AND ccu.table_schema = tc.table_schema
+        WHERE tc.constraint_type = 'FOREIGN KEY' AND tc.table_schema = %s
+    """, (schema_name,))
+    schema_info["relationships"] = cursor.fetchall()
+    return schema_info
+
+
+def create_tables(cursor, count):
+    cursor.execute(f"DROP SCHEMA IF EXISTS {BENCH_SCHEMA} CASCADE")
+    cursor.execute(f"CREATE SCHEMA {BENCH_SCHEMA}")
+    for i in range(count):
+        reference = f", parent_id integer REFERENCES {BENCH_SCHEMA}.t_{i - 1}(id)" if i else ""
+        cursor.execute(f"""
+            CREATE TABLE {BENCH_SCHEMA}.t_{i} (
+                id serial PRIMARY KEY,
+                name text NOT NULL,
+                amount numeric(12, 2) DEFAULT 0,
+                created_at timestamp DEFAULT now(),
+                status varchar(20){reference}
+            )
+        """)
+
+
+def time_strategy(conn, strategy, repeat):
+    timings = []
+    for _ in range(repeat):
+        with conn.cursor() as cursor:
+            started = time.perf_counter()
+            result = strategy(cursor, BENCH_SCHEMA)
+            timings.append(time.perf_counter() - started)
+        conn.rollback()
+    return statistics.median(timings), len(result["tables"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tables", type=int, nargs="+", default=[10, 50, 200, 600])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    conn = get_database_connection()
+    try:
+        print(f"{'tables':>8} {'legacy (s)':>12} {'bulk (s)':>10} {'speedup':>9}")
+        for count in args.tables:
+            with conn.cursor() as cursor:
+                create_tables(cursor, count)
+            conn.commit()
+
+            legacy, legacy_tables = time_strategy(conn, legacy_introspect, args.repeat)
+            bulk, bulk_tables = time_strategy(conn, introspect_schema, args.repeat)
+            assert legacy_tables == bulk_tables == count, (legacy_tables, bulk_tables, count)
+
+            print(f"{count:>8} {legacy:>12.4f} {bulk:>10.4f} {legacy / bulk:>8.1f}x")
+    finally:
+        with conn.cursor() as cursor:
+            cursor.execute(f"DROP SCHEMA IF EXISTS {BENCH_SCHEMA} CASCADE")
+        conn.commit()
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
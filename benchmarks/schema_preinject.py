@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Agent latency with the schema fetched through the get_database_schema tool vs. pre-injected
+into the system prompt (SCHEMA_PREINJECT).
+
+Runs each question through the compiled agent graph in both modes against the LLM and database
+configured in .env, and reports median wall time and LLM turns per question.
+
+Usage: python benchmarks/schema_preinject.py --repeat 3 "How many customers are there?"
+"""
+import os
+import sys
+import time
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+from langchain_core.messages import HumanMessage, AIMessage
+from backend.graph.agent import get_agent
+from backend.graph.tools import discover_database_schema
+
+load_dotenv()
+
+DEFAULT_QUESTIONS = [
+    "How many customers are there?",
+    "Which customers have placed more than one order?",
+    "What is the total order amount per customer?",
+]
+
+
+def run_once(agent, question, preinject):
+    started = time.perf_counter()
+    result = agent.invoke({
+        "messages": [HumanMessage(content=question)],
+        "question": question,
+        "preinject_schema": preinject
+    })
+    elapsed = time.perf_counter() - started
+    turns = sum(1 for msg in result["messages"] if isinstance(msg, AIMessage))
+    return elapsed, turns
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("questions", nargs="*", default=DEFAULT_QUESTIONS)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    agent = get_agent()
+    discover_database_schema()
+
+    totals = {False: [], True: []}
+    print(f"{'mode':<10} {'median (s)':>11} {'turns':>6}  question")
+    for question in args.questions:
+        for preinject in (False, True):
+            runs = [run_once(agent, question, preinject) for _ in range(args.repeat)]
+            median = statistics.median(elapsed for elapsed, _ in runs)
+            turns = statistics.median(turns for _, turns in runs)
+            totals[preinject].append(median)
+            mode = "preinject" if preinject else "tool"
+            print(f"{mode:<10} {median:>11.3f} {turns:>6.1f}  {question}")
+
+    tool_total, preinject_total = sum(totals[False]), sum(totals[True])
+    print(f"\nTotal median latency: tool {tool_total:.3f}s, preinject {preinject_total:.3f}s "
+          f"({(1 - preinject_total / tool_total) * 100:.1f}% faster)")
+
+
+if __name__ == "__main__":
+    main()
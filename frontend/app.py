@@ -1,7 +1,6 @@
 import streamlit as st
 import requests
 import json
-import time
 import re
 from typing import Dict, Any
 
@@ -145,6 +144,28 @@ def make_api_request(endpoint: str, method: str = "GET", data: Dict = None) -> D
     except Exception as e:
         return {"success": False, "error": f"❌ Unexpected error: {str(e)}"}
 
+def stream_api_request(endpoint: str, data: Dict):
+    try:
+        url = f"{API_BASE_URL}{endpoint}"
+        with requests.post(url, json=data, stream=True, timeout=(5, 120)) as response:
+            if response.status_code != 200:
+                yield "error", {"error": f"API Error: {response.status_code}"}
+                return
+            
+            event = "message"
+            for line in response.iter_lines(decode_unicode=True):
+                if line.startswith("event:"):
+                    event = line[len("event:"):].strip()
+                elif line.startswith("data:"):
+                    yield event, json.loads(line[len("data:"):])
+                    event = "message"
+    except requests.exceptions.ConnectionError:
+        yield "error", {"error": "❌ Cannot connect to API. Make sure the FastAPI server is running on http://localhost:8000"}
+    except requests.exceptions.Timeout:
+        yield "error", {"error": "⏱️ Request timed out. The query might be taking too long."}
+    except Exception as e:
+        yield "error", {"error": f"❌ Unexpected error: {str(e)}"}
+
 def format_sql_query(sql_query: str) -> str:
     if not sql_query:
         return sql_query
@@ -196,6 +217,19 @@ def main():
                     else:
                         st.error(result["error"])
         
+        with st.expander("🎯 Query Target"):
+            result = make_api_request("/database/targets")
+            targets = [target["name"] for target in result["data"]] if result["success"] else []
+            if "default" not in targets:
+                targets.insert(0, "default")
+            current = st.session_state.get("database", "default")
+            st.session_state.database = st.selectbox(
+                "Database target",
+                targets,
+                index=targets.index(current) if current in targets else 0,
+                help="Named targets are registered with POST /database/targets"
+            )
+        
         with st.expander("🔄 Switch Database"):
             st.markdown("Connect to a different database:")
             
@@ -255,42 +289,60 @@ def main():
             st.markdown('<div class="info-card">', unsafe_allow_html=True)
             st.markdown("### 🔍 Query Results")
             
-            with st.spinner("🤖 AI is analyzing your question and querying the database..."):
-                progress_bar = st.progress(0)
-                for i in range(100):
-                    time.sleep(0.01)
-                    progress_bar.progress(i + 1)
-                
-                result = make_api_request("/query/ask", "POST", {"question": user_question})
+            status = st.empty()
+            status.info("🤖 AI is analyzing your question...")
             
-            progress_bar.empty()
+            tab1, tab2, tab3 = st.tabs(["📝 Answer", "🔧 SQL Query", "📊 Data"])
+            with tab1:
+                answer_placeholder = st.empty()
+            with tab2:
+                sql_placeholder = st.empty()
+            with tab3:
+                rows_placeholder = st.empty()
             
-            if result["success"]:
-                data = result["data"]
-                sql_query = data.get("sql_query", "No query generated")
-                answer = data.get("answer", "No answer generated")
-                
-                tab1, tab2 = st.tabs(["📝 Answer", "🔧 SQL Query"])
-                
-                with tab1:
-                    st.markdown('<div class="success-box">', unsafe_allow_html=True)
-                    st.markdown("#### 🎯 Answer:")
-                    st.markdown(f"**{answer}**")
-                    st.markdown('</div>', unsafe_allow_html=True)
-                
-                with tab2:
-                    st.markdown("#### 🔧 Generated SQL Query:")
-                    formatted_sql = format_sql_query(sql_query)
-                    st.code(formatted_sql, language="sql")
-                    
-                    if st.button("📋 Copy SQL", key="copy_sql"):
-                        st.success("SQL query copied to clipboard! (Feature simulated)")
-                
-            else:
+            answer = ""
+            error = None
+            for event, data in stream_api_request(
+                "/query/ask/stream",
+                {"question": user_question, "database": st.session_state.get("database", "default")}
+            ):
+                if event == "schema":
+                    status.info(f"📋 Schema ready ({data['tables_sent']}/{data['tables_total']} tables). Generating SQL...")
+                elif event == "sql":
+                    sql_placeholder.code(format_sql_query(data["sql"]), language="sql")
+                    status.info("⚙️ Running SQL query...")
+                elif event == "rows":
+                    if data["error"]:
+                        rows_placeholder.error(data["error"])
+                    else:
+                        shown = len(data["data"][0]) if data["data"] else 0
+                        with rows_placeholder.container():
+                            st.dataframe(dict(zip(data["columns"], data["data"])), use_container_width=True)
+                            if data["truncated"] or (data["row_count"] or 0) > shown:
+                                total = f"more than {data['row_count']}" if data["truncated"] else data["row_count"]
+                                st.caption(f"Showing {shown} of {total} rows. "
+                                           f"Page through the rest via /query/results/{data['result_id']}")
+                    status.info("✍️ Writing answer...")
+                elif event == "answer_token":
+                    answer += data["token"]
+                    answer_placeholder.markdown(f"**{answer}**")
+                elif event == "done":
+                    answer_placeholder.markdown(f"**{data.get('answer') or 'No answer generated'}**")
+                    sql_placeholder.code(format_sql_query(data.get("sql_query", "No query generated")), language="sql")
+                    status.success("✅ Done")
+                elif event == "error":
+                    error = data["error"]
+            
+            if error:
+                status.empty()
                 st.markdown('<div class="error-box">', unsafe_allow_html=True)
                 st.markdown("#### ❌ Error:")
-                st.markdown(result["error"])
+                st.markdown(error)
                 st.markdown('</div>', unsafe_allow_html=True)
+            else:
+                with tab2:
+                    if st.button("📋 Copy SQL", key="copy_sql"):
+                        st.success("SQL query copied to clipboard! (Feature simulated)")
             
             st.markdown('</div>', unsafe_allow_html=True)
     
@@ -324,7 +376,7 @@ def main():
         st.markdown("### 📋 Database Schema")
         if st.button("🔍 Get Schema", key="get_schema"):
             with st.spinner("Fetching database schema..."):
-                result = make_api_request("/database/schema")
+                result = make_api_request(f"/database/schema?database={requests.utils.quote(st.session_state.get('database', 'default'))}")
                 if result["success"]:
                     schema_text = result["data"].get("schema_data", "No schema found")
                     st.text_area("Database Schema", schema_text, height=300, key="schema_display")
@@ -1,13 +1,37 @@
+import os
+import logging
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from dotenv import load_dotenv
 from backend.routes import query, database
 from backend.utils.db_manager import apply_database_config
+from backend.graph.agent import get_agent
+from backend.graph.tools import discover_database_schema
+from backend.utils.metrics import registry
+from backend.utils.db_registry import record_pool_stats
+from backend.utils.tracing import configure_tracing
 
 load_dotenv()
 
+logging.basicConfig(
+    level=os.getenv("LOG_LEVEL", "INFO").upper(),
+    format="%(asctime)s %(levelname)s %(name)s: %(message)s"
+)
+
 apply_database_config()
+configure_tracing()
 
 app = FastAPI()
 
+@app.on_event("startup")
+def warm_up_agent():
+    get_agent()
+    discover_database_schema()
+
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def metrics():
+    record_pool_stats()
+    return PlainTextResponse(registry.render_prometheus(), media_type="text/plain; version=0.0.4")
+
 app.include_router(query.router, prefix="/query", tags=["Query"])
 app.include_router(database.router, prefix="/database", tags=["Database"])
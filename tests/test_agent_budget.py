@@ -0,0 +1,14 @@
+from backend.graph.agent import graph_config
+
+
+def budget(max_iterations):
+    return {"budget": {"max_iterations": max_iterations}}
+
+
+def test_recursion_limit_follows_the_iteration_budget():
+    assert graph_config(budget(8))["recursion_limit"] == 20
+
+
+def test_no_iteration_limit_lifts_the_recursion_limit():
+    # LangGraph's own default of 25 steps would otherwise end a long loop with GraphRecursionError
+    assert graph_config(budget(0))["recursion_limit"] > 1000
@@ -0,0 +1,20 @@
+import asyncio
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from backend.routes import query
+
+app = FastAPI()
+app.include_router(query.router, prefix="/query")
+
+
+def test_cancelled_question_is_reported_per_question(monkeypatch):
+    async def process_batch_async(questions, **kwargs):
+        return [("SELECT 1", "one", []), asyncio.CancelledError()]
+
+    monkeypatch.setattr(query, "process_batch_async", process_batch_async)
+    response = TestClient(app).post("/query/ask/batch", json={"questions": ["first", "second"]})
+
+    assert response.status_code == 200
+    first, second = response.json()["results"]
+    assert first["answer"] == "one" and first["error"] is None
+    assert second["error"] == "CancelledError"
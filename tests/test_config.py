@@ -0,0 +1,20 @@
+import pytest
+from backend.utils.config import env_flag
+
+
+@pytest.mark.parametrize("value", ["1", "true", "TRUE", "Yes", " yes "])
+def test_truthy_values(monkeypatch, value):
+    monkeypatch.setenv("SQL_AGENT_TEST_FLAG", value)
+    assert env_flag("SQL_AGENT_TEST_FLAG") is True
+
+
+@pytest.mark.parametrize("value", ["0", "false", "no", "off", ""])
+def test_falsy_values(monkeypatch, value):
+    monkeypatch.setenv("SQL_AGENT_TEST_FLAG", value)
+    assert env_flag("SQL_AGENT_TEST_FLAG", True) is False
+
+
+def test_default_when_unset(monkeypatch):
+    monkeypatch.delenv("SQL_AGENT_TEST_FLAG", raising=False)
+    assert env_flag("SQL_AGENT_TEST_FLAG") is False
+    assert env_flag("SQL_AGENT_TEST_FLAG", True) is True
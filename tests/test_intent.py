@@ -0,0 +1,58 @@
+import pytest
+from backend.graph.intent import GREETING, OFF_TOPIC, SCHEMA, DATA, classify_intent
+from backend.graph.schema_retrieval import SchemaIndex
+
+SCHEMA_INFO = {
+    "tables": {
+        "customers": {"columns": [{"name": "customer_id", "type": "integer"}, {"name": "first_name", "type": "text"},
+                                  {"name": "email", "type": "text"}]},
+        "orders": {"columns": [{"name": "order_id", "type": "integer"}, {"name": "customer_id", "type": "integer"},
+                               {"name": "order_date", "type": "date"}, {"name": "total_amount", "type": "numeric"}]},
+        "products": {"columns": [{"name": "product_id", "type": "integer"}, {"name": "price", "type": "numeric"}]},
+    },
+    "relationships": [],
+}
+VOCABULARY = SchemaIndex(SCHEMA_INFO).vocabulary
+
+
+def intent(question):
+    return classify_intent(question, VOCABULARY)[0]
+
+
+@pytest.mark.parametrize("question", [
+    "hello", "hi there", "Good morning!", "thanks", "how are you", "hey bot, how is it going", "bye",
+])
+def test_greetings(question):
+    assert intent(question) == GREETING
+
+
+@pytest.mark.parametrize("question", [
+    "what tables exist", "list all tables", "show me the tables", "how many tables are there",
+    "what columns does the orders table have", "describe the customers table", "what is the schema",
+    "what fields are in the customers table", "show the database structure", "what data do you have",
+    "what kind of data is stored",
+])
+def test_schema_questions(question):
+    assert intent(question) == SCHEMA
+
+
+@pytest.mark.parametrize("question", [
+    "how many customers are there", "which customers placed more than 5 orders", "average order value",
+    "what data is stored for orders placed yesterday", "which fields are empty in customers",
+    "who is our best client", "tell me about sales", "give me a summary", "is it going up",
+    "show the customers table", "what is the history of orders for customer 5", "which city has the most customers",
+    "hi, how many orders were placed yesterday",
+])
+def test_data_questions_reach_the_agent(question):
+    assert intent(question) == DATA
+
+
+@pytest.mark.parametrize("question", [
+    "tell me a joke", "what is the weather today", "write me a poem", "what is the capital of france",
+])
+def test_off_topic(question):
+    assert intent(question) == OFF_TOPIC
+
+
+def test_uncertain_questions_stay_data():
+    assert classify_intent("tell me a joke", VOCABULARY, threshold=1.01)[0] == DATA
@@ -0,0 +1,38 @@
+from backend.utils.query_cache import QuestionCache
+
+SCOPE = ("db", "fingerprint")
+QUESTION = "list customers who placed orders in the last month and spent more than average"
+SQL = "SELECT 1"
+
+
+def test_similarity_matching_is_off_by_default():
+    cache = QuestionCache()
+    cache.put(SCOPE, QUESTION, SQL)
+    assert cache.get(SCOPE, QUESTION) == (SQL, "exact")
+    assert cache.get(SCOPE, QUESTION.replace("placed", "made")) == (None, None)
+
+
+def test_similar_match_when_enabled():
+    cache = QuestionCache(similarity_threshold=0.8)
+    cache.put(SCOPE, QUESTION, SQL)
+    assert cache.get(SCOPE, QUESTION.replace("placed", "made")) == (SQL, "similar")
+
+
+def test_negation_must_match():
+    cache = QuestionCache(similarity_threshold=0.5)
+    cache.put(SCOPE, QUESTION, SQL)
+    assert cache.get(SCOPE, QUESTION.replace("who placed", "who never placed")) == (None, None)
+    assert cache.get(SCOPE, QUESTION.replace("who placed", "who did not place")) == (None, None)
+
+
+def test_comparison_must_match():
+    cache = QuestionCache(similarity_threshold=0.5)
+    cache.put(SCOPE, QUESTION, SQL)
+    assert cache.get(SCOPE, QUESTION.replace("more", "less")) == (None, None)
+    assert cache.get(SCOPE, "list customers who placed orders in the last month and spent above average") == (None, None)
+
+
+def test_numbers_must_match():
+    cache = QuestionCache(similarity_threshold=0.5)
+    cache.put(SCOPE, "top 5 customers by spend", SQL)
+    assert cache.get(SCOPE, "top 10 customers by spend") == (None, None)
@@ -0,0 +1,30 @@
+import pytest
+from backend.graph.tools import run_sql
+from backend.utils.db_registry import database_registry, using_database
+
+UNREACHABLE = {"dbname": "none", "user": "none", "password": "none", "host": "/nonexistent", "port": "1"}
+
+
+@pytest.fixture
+def unreachable_target(monkeypatch):
+    monkeypatch.setenv("SQL_VALIDATION", "false")
+    monkeypatch.setenv("RESULT_CACHE_ENABLED", "false")
+    database_registry.register("unreachable", UNREACHABLE)
+    yield "unreachable"
+    database_registry.remove("unreachable")
+
+
+def test_connection_failure_is_recorded(unreachable_target):
+    with using_database(unreachable_target):
+        execution = run_sql("SELECT 1")
+    assert execution["sql"] == "SELECT 1"
+    assert execution["error"]
+    assert execution["result"].startswith("Error executing query:")
+
+
+def test_closed_target_is_recorded(unreachable_target):
+    target = database_registry.get(unreachable_target)
+    target.close()
+    with using_database(unreachable_target):
+        execution = run_sql("SELECT 1")
+    assert "replaced or removed" in execution["error"]
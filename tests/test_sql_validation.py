@@ -0,0 +1,135 @@
+import pytest
+from backend.graph.sql_validation import validate_sql
+
+SCHEMA = {
+    "tables": {
+        "customers": {
+            "columns": [
+                {"name": "customer_id", "type": "integer"},
+                {"name": "first_name", "type": "text"},
+                {"name": "last_name", "type": "text"},
+                {"name": "created_at", "type": "timestamp with time zone"},
+            ],
+            "primary_key": ["customer_id"],
+        },
+        "orders": {
+            "columns": [
+                {"name": "order_id", "type": "integer"},
+                {"name": "customer_id", "type": "integer"},
+                {"name": "order_date", "type": "date"},
+                {"name": "total_amount", "type": "numeric"},
+            ],
+            "primary_key": ["order_id"],
+        },
+    },
+    "relationships": [
+        {"from_table": "orders", "from_column": "customer_id", "to_table": "customers", "to_column": "customer_id"}
+    ],
+}
+
+
+def validate(sql):
+    return validate_sql(sql, SCHEMA)
+
+
+@pytest.mark.parametrize("sql", [
+    "SELECT EXTRACT(isodow FROM order_date) FROM orders",
+    "SELECT EXTRACT(isoyear FROM order_date), EXTRACT(century FROM order_date) FROM orders",
+    "SELECT EXTRACT(milliseconds FROM created_at) FROM customers",
+    "SELECT order_id FROM orders WHERE (total_amount > 100) IS UNKNOWN",
+    "SELECT order_id FROM orders WHERE (total_amount > 100) IS NOT UNKNOWN",
+    "SELECT CAST(created_at AS timestamp without time zone) FROM customers",
+    "SELECT created_at::timestamp without time zone FROM customers",
+    "SELECT CAST(first_name AS character varying(20)) FROM customers",
+    "SELECT CAST(total_amount AS double precision) FROM orders",
+    "SELECT order_id FROM orders WHERE total_amount BETWEEN SYMMETRIC 500 AND 100",
+    "SELECT first_name FROM customers ORDER BY first_name COLLATE \"C\"",
+    "SELECT first_name FROM customers ORDER BY first_name COLLATE pg_catalog.\"default\"",
+    "SELECT public.customers.first_name FROM public.customers",
+    "SELECT public.customers.first_name FROM customers",
+    "SELECT c.first_name, o.total_amount FROM customers c JOIN orders o ON c.customer_id = o.customer_id",
+    "WITH big AS (SELECT * FROM orders WHERE total_amount > 100) SELECT order_id FROM big",
+    "SELECT first_name AS name FROM customers ORDER BY name",
+])
+def test_valid_postgres_is_accepted(sql):
+    _, errors, _ = validate(sql)
+    assert errors == []
+
+
+def test_unknown_bare_identifier_is_left_to_the_database():
+    _, errors, _ = validate("SELECT first_name FROM customers WHERE some_setting_we_do_not_know")
+    assert errors == []
+
+
+def test_misspelled_column_is_rejected_with_suggestion():
+    _, errors, _ = validate("SELECT frist_name FROM customers")
+    assert len(errors) == 1
+    assert "first_name" in errors[0]
+
+
+def test_column_from_table_not_in_from_is_rejected():
+    _, errors, _ = validate("SELECT total_amount FROM customers")
+    assert len(errors) == 1
+    assert "orders" in errors[0]
+
+
+def test_qualified_column_on_wrong_table_is_rejected():
+    _, errors, _ = validate("SELECT c.total_amount FROM customers c JOIN orders o ON c.customer_id = o.customer_id")
+    assert len(errors) == 1
+    assert "It exists on orders" in errors[0]
+
+
+def test_three_part_name_checks_the_column():
+    _, errors, _ = validate("SELECT public.customers.frist_name FROM customers")
+    assert len(errors) == 1
+    assert "first_name" in errors[0]
+
+
+def test_three_part_name_in_other_schema_is_not_checked():
+    _, errors, _ = validate("SELECT audit.log.whatever FROM customers")
+    assert errors == []
+
+
+def test_unknown_table_is_rejected():
+    _, errors, _ = validate("SELECT * FROM customer_orders")
+    assert len(errors) == 1
+    assert "customer_orders" in errors[0]
+
+
+def test_identifier_case_is_fixed():
+    sql, errors, fixes = validate("SELECT First_Name FROM Customers")
+    assert errors == []
+    assert sql == "SELECT first_name FROM customers"
+    assert fixes
+
+
+def test_write_statements_are_rejected_when_read_only():
+    _, errors, _ = validate("DELETE FROM customers")
+    assert errors
+    _, errors, _ = validate_sql("DELETE FROM customers", SCHEMA, read_only=False)
+    assert errors == []
+
+
+RESERVED_SCHEMA = {
+    "tables": {
+        "accounts": {
+            "columns": [{"name": name, "type": "text"} for name in ("user", "check", "column", "unique")],
+            "primary_key": [],
+        },
+    },
+    "relationships": [],
+}
+
+
+def test_quoted_reserved_word_column_keeps_its_quotes():
+    sql = 'SELECT "user", "check", "column", "unique" FROM accounts'
+    fixed, errors, fixes = validate_sql(sql, RESERVED_SCHEMA)
+    assert errors == []
+    assert fixed == sql
+    assert fixes == []
+
+
+def test_case_fixed_reserved_word_column_is_quoted():
+    fixed, errors, _ = validate_sql('SELECT "User" FROM accounts', RESERVED_SCHEMA)
+    assert errors == []
+    assert fixed == 'SELECT "user" FROM accounts'